@@ -3,22 +3,29 @@ import asyncio
 import logging
 import signal
 import sys
-from typing import Any, Awaitable, Callable, Dict
+from typing import Optional
 
-from aiogram import Bot, Dispatcher, BaseMiddleware
+from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 from src.config import Config
 from src.database.models import Database
 from src.services.payment_service import PaymentService
 from src.services.user_service import UserService
 from src.bot.handlers import router
 
-# Флаг для корректного завершения
-_shutdown_flag = False
-
-
 
 # Configure logging
 logging.basicConfig(
@@ -31,14 +38,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _orjson_dumps(value) -> str:
+    """Serialize value with orjson; aiogram expects str, not bytes."""
+    return orjson.dumps(value).decode()
+
+
+def create_session() -> AiohttpSession:
+    """Create bot HTTP session, using orjson for JSON when it is installed."""
+    if orjson is None:
+        return AiohttpSession()
+    return AiohttpSession(json_loads=orjson.loads, json_dumps=_orjson_dumps)
+
+
 async def main() -> None:
     """Main bot function."""
-    # Load configuration
-    config = Config.load()
-    
-    # Validate configuration
-    if not config.validate():
-        logger.error("Configuration validation failed. Exiting.")
+    # Load and validate configuration
+    try:
+        config = Config.from_env()
+    except ValueError as e:
+        logger.error("Configuration error: %s", e)
+        logger.error("Please check your .env file and ensure all required variables are set")
         sys.exit(1)
     
     # Configure logging with file handler if specified
@@ -55,12 +74,14 @@ async def main() -> None:
     # Initialize bot and dispatcher
     bot = Bot(
         token=config.BOT_TOKEN,
+        session=create_session(),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
     dp = Dispatcher()
 
     # Initialize database
-    db = Database(config.DB_PATH)
+    db = Database(config.DB_PATH, pool_size=config.DB_POOL_SIZE)
+    await db.connect()
     await db.create_table()
 
     # Initialize services
@@ -73,71 +94,74 @@ async def main() -> None:
     # Register router
     dp.include_router(router)
 
-    # Inject dependencies via middleware
-    class DependencyMiddleware(BaseMiddleware):
-        async def __call__(
-            self,
-            handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
-            event: Any,
-            data: Dict[str, Any],
-        ) -> Any:
-            data["db"] = db
-            data["payment_service"] = payment_service
-            data["user_service"] = user_service
-            data["channel_id"] = config.CHANNEL_ID
-            data["course_price"] = config.COURSE_PRICE
-            return await handler(event, data)
-
-    dp.message.middleware(DependencyMiddleware())
-    dp.callback_query.middleware(DependencyMiddleware())
-    dp.pre_checkout_query.middleware(DependencyMiddleware())
-
-    # Graceful shutdown handler
-    def signal_handler(sig, frame):
-        global _shutdown_flag
+    # Inject dependencies via workflow data (passed to handlers by name)
+    dp["db"] = db
+    dp["payment_service"] = payment_service
+    dp["user_service"] = user_service
+    dp["channel_id"] = config.CHANNEL_ID
+    dp["course_price"] = config.COURSE_PRICE
+
+    # Graceful shutdown handler: runs inside the event loop, stops polling
+    # once (repeated signals are ignored), and the finally block below
+    # performs the actual cleanup
+    stop_task: Optional[asyncio.Task] = None
+
+    def signal_handler() -> None:
+        nonlocal stop_task
+        if stop_task is not None:
+            return
         logger.info("Received shutdown signal")
-        _shutdown_flag = True
-        asyncio.create_task(shutdown(bot, dp))
+        stop_task = asyncio.create_task(dp.stop_polling())
 
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, signal_handler)
+        except NotImplementedError:
+            # Windows: Ctrl+C is delivered as KeyboardInterrupt instead
+            pass
 
     try:
         logger.info("Bot starting...")
         # Запуск polling - aiogram сам обрабатывает сетевые ошибки
-        await dp.start_polling(bot)
+        await dp.start_polling(bot, handle_signals=False)
     except KeyboardInterrupt:
         logger.info("Получен сигнал остановки")
     except Exception as e:
-        logger.error(f"Error in polling: {e}")
+        logger.error("Error in polling: %s", e)
     finally:
-        await shutdown(bot, dp)
+        if stop_task is not None:
+            try:
+                await stop_task
+            except Exception as e:
+                logger.warning("Ошибка при остановке polling: %s", e)
+        await shutdown(bot, db)
 
 
-async def shutdown(bot: Bot, dp: Dispatcher) -> None:
-    """Graceful shutdown."""
-    global _shutdown_flag
-    _shutdown_flag = True
-    
+async def shutdown(bot: Bot, db: Database) -> None:
+    """Graceful shutdown (polling has already returned)."""
     logger.info("Shutting down...")
     
-    # Остановка polling
+    # Закрытие сессии бота
     try:
-        await dp.stop_polling()
+        await bot.session.close()
     except Exception as e:
-        logger.warning(f"Ошибка при остановке polling: {e}")
+        logger.warning("Ошибка при закрытии сессии бота: %s", e)
     
-    # Закрытие сессии бота
+    # Закрытие соединения с БД
     try:
-        await bot.session.close()
+        await db.close()
     except Exception as e:
-        logger.warning(f"Ошибка при закрытии сессии бота: {e}")
+        logger.warning("Ошибка при закрытии соединения с БД: %s", e)
     
     logger.info("Bot stopped")
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
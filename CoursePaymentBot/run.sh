@@ -48,6 +48,9 @@ if [ -f "requirements.txt" ]; then
     echo "📥 Установка зависимостей из requirements.txt..."
     pip install -r requirements.txt --quiet
     echo "✅ Зависимости установлены"
+    # Байткод модулей бота собирается вместе с установкой. Режим по меткам
+    # времени: при неизменных исходниках повторный запуск только сверяет mtime
+    python -m compileall -q -j 0 main.py src
 else
     echo "⚠️  Файл requirements.txt не найден"
 fi
@@ -2,6 +2,7 @@
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, PreCheckoutQuery
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
 import logging
 
 from src.services.payment_service import PaymentService
@@ -13,6 +14,21 @@ logger = logging.getLogger(__name__)
 
 router = Router()
 
+_TRIAL_UNAVAILABLE = (
+    "📚 Пробный урок временно недоступен.\n\n"
+    "Но вы можете приобрести полный курс прямо сейчас!"
+)
+_materials = MaterialLoader()
+
+
+def _get_trial() -> str:
+    """Return the trial lesson text (cached by the loader until the file changes)."""
+    try:
+        return _materials.load_trial_lesson()
+    except FileNotFoundError:
+        logger.warning("Trial lesson file not found, using fallback text")
+        return _TRIAL_UNAVAILABLE
+
 
 @router.message(Command("start"))
 async def cmd_start(
@@ -52,7 +68,7 @@ async def cmd_start(
                         reply_markup=main_menu(course_price)
                     )
             except Exception as e:
-                logger.error(f"Error creating invite link for paid user {user_id}: {e}")
+                logger.error("Error creating invite link for paid user %s: %s", user_id, e)
                 await message.answer(
                     "👋 Добро пожаловать обратно!\n\n"
                     "Вы уже оплатили курс. Обратитесь к администратору для получения доступа.",
@@ -65,7 +81,7 @@ async def cmd_start(
                 reply_markup=main_menu(course_price)
             )
     except Exception as e:
-        logger.error(f"Error in /start handler: {e}")
+        logger.error("Error in /start handler: %s", e)
         await message.answer("Произошла ошибка. Попробуйте позже.")
 
 
@@ -73,21 +89,14 @@ async def cmd_start(
 async def cmd_trial(message: Message, course_price: int = 990) -> None:
     """Handle /trial command."""
     try:
-        loader = MaterialLoader()
-        trial_content = loader.load_trial_lesson()
+        trial_content = _get_trial()
         
         await message.answer(
             trial_content,
             reply_markup=buy_btn(course_price)
         )
-    except FileNotFoundError:
-        await message.answer(
-            "📚 Пробный урок временно недоступен.\n\n"
-            "Но вы можете приобрести полный курс прямо сейчас!",
-            reply_markup=buy_btn(course_price)
-        )
     except Exception as e:
-        logger.error(f"Error in /trial handler: {e}")
+        logger.error("Error in /trial handler: %s", e)
         await message.answer("Произошла ошибка при загрузке пробного урока.")
 
 
@@ -95,23 +104,21 @@ async def cmd_trial(message: Message, course_price: int = 990) -> None:
 async def callback_trial(callback: CallbackQuery, course_price: int = 990) -> None:
     """Handle trial button callback."""
     try:
-        loader = MaterialLoader()
-        trial_content = loader.load_trial_lesson()
+        trial_content = _get_trial()
         
-        await callback.message.edit_text(
-            trial_content,
-            reply_markup=buy_btn(course_price)
-        )
-        await callback.answer()
-    except FileNotFoundError:
-        await callback.message.edit_text(
-            "📚 Пробный урок временно недоступен.\n\n"
-            "Но вы можете приобрести полный курс прямо сейчас!",
-            reply_markup=buy_btn(course_price)
-        )
+        try:
+            await callback.message.edit_text(
+                trial_content,
+                reply_markup=buy_btn(course_price)
+            )
+        except TelegramBadRequest as e:
+            # A repeated tap that raced the first edit: the message already
+            # shows the trial lesson, so there is nothing to report
+            if "message is not modified" not in str(e):
+                raise
         await callback.answer()
     except Exception as e:
-        logger.error(f"Error in trial callback: {e}")
+        logger.error("Error in trial callback: %s", e)
         await callback.answer("Произошла ошибка.", show_alert=True)
 
 
@@ -128,7 +135,7 @@ async def callback_buy_course(
         await callback.answer()
     except ValueError as e:
         error_msg = str(e)
-        logger.error(f"Error in buy_course callback: {error_msg}")
+        logger.error("Error in buy_course callback: %s", error_msg)
         await callback.answer(
             "❌ Ошибка: токен провайдера не настроен.\n\n"
             "Проверьте .env файл и настройте PROVIDER_TOKEN.\n"
@@ -137,7 +144,7 @@ async def callback_buy_course(
         )
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Error in buy_course callback: {e}")
+        logger.error("Error in buy_course callback: %s", e)
         
         # More user-friendly error messages
         if "PAYMENT_PROVIDER_INVALID" in error_msg:
@@ -184,7 +191,7 @@ async def successful_payment_handler(
             f"Ссылка одноразовая, используйте её для входа в канал с курсом."
         )
     else:
-        logger.warning(f"Could not create invite link for user {user_id}. Channel: {channel_id}")
+        logger.warning("Could not create invite link for user %s. Channel: %s", user_id, channel_id)
         await message.answer(
             f"✅ Оплата успешно получена!\n\n"
             f"⚠️ Внимание: не удалось автоматически создать ссылку для доступа.\n\n"
@@ -1,71 +1,77 @@
 """Configuration management using OOP."""
 import logging
-import sys
+import os
+from dataclasses import MISSING, dataclass, fields
 from pathlib import Path
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
+
+from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
 
-class Config(BaseSettings):
-    """Bot configuration class loaded from environment variables."""
+def _env(name: str) -> Optional[str]:
+    """Read an environment variable case-insensitively, ignoring empty values."""
+    value = os.environ.get(name)
+    if value is None:
+        value = os.environ.get(name.lower())
+    return value or None
 
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=False,
-        env_ignore_empty=True,
-    )
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Bot configuration class loaded from environment variables."""
 
     # Telegram Bot Configuration
     BOT_TOKEN: str
     
     # Payment Configuration
     PROVIDER_TOKEN: str
-    COURSE_PRICE: int = 990
     
     # Channel Configuration
     CHANNEL_ID: str
     
+    COURSE_PRICE: int = 990
+    
     # Database Configuration
     DB_PATH: str = "bot.db"
+    DB_POOL_SIZE: int = 8
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "bot.log"
 
     @classmethod
-    def load(cls) -> "Config":
-        """Load configuration from .env file."""
-        try:
-            config = cls()
-            logger.info("Configuration loaded successfully")
-            return config
-        except Exception as e:
-            logger.error(f"Error loading configuration: {e}")
-            logger.error("Please check your .env file and ensure all required variables are set")
-            sys.exit(1)
-
-    def validate(self) -> bool:
-        """Validate configuration values."""
-        errors = []
+    def from_env(cls) -> "Config":
+        """
+        Load and validate configuration from environment and .env file.
         
-        if not self.BOT_TOKEN:
-            errors.append("BOT_TOKEN is required")
-        
-        if not self.PROVIDER_TOKEN:
-            errors.append("PROVIDER_TOKEN is required")
-        
-        if not self.CHANNEL_ID:
-            errors.append("CHANNEL_ID is required")
-        
-        if self.COURSE_PRICE <= 0:
-            errors.append("COURSE_PRICE must be greater than 0")
-        
-        if errors:
-            logger.error("Configuration validation failed:")
-            for error in errors:
-                logger.error(f"  - {error}")
-            return False
-        
-        return True
+        Raises:
+            ValueError: If a required variable is missing or a value is invalid
+        """
+        # Variables already set in the environment take priority over .env
+        if Path(".env").is_file():
+            load_dotenv(".env", encoding="utf-8", override=False)
+
+        values = {}
+        for field in fields(cls):
+            value = _env(field.name)
+            if value is None:
+                if field.default is MISSING:
+                    raise ValueError(f"{field.name} is required")
+                continue
+            if field.type is int:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f"{field.name} must be an integer") from None
+            values[field.name] = value
+
+        config = cls(**values)
+        if config.COURSE_PRICE <= 0:
+            raise ValueError("COURSE_PRICE must be greater than 0")
+        if config.DB_POOL_SIZE <= 0:
+            raise ValueError("DB_POOL_SIZE must be greater than 0")
+
+        logger.info("Configuration loaded successfully")
+        return config
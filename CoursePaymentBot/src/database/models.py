@@ -1,82 +1,336 @@
 """Database models and CRUD operations."""
+import asyncio
 import aiosqlite
-from datetime import datetime
 import logging
-from typing import Optional
+import sqlite3
+from contextlib import asynccontextmanager
+from itertools import groupby
+from typing import AsyncIterator, Optional
 
 logger = logging.getLogger(__name__)
 
+# How long the writer waits for more writes before committing a batch
+_WRITE_BATCH_WINDOW = 0.005
+# Upper bound on statements committed in one transaction
+_WRITE_BATCH_MAX = 500
+
+# Applied once per connection: WAL lets reads proceed during writes and
+# NORMAL sync only fsyncs on checkpoints
+_SQL_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-8000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+_SQL_CREATE = """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY,
+        paid BOOLEAN DEFAULT FALSE,
+        join_date TEXT,
+        payment_date TEXT
+    )
+"""
+# join_date is filled by SQLite itself, so no datetime formatting per call
+_SQL_ADD = (
+    "INSERT OR IGNORE INTO users (user_id, join_date) "
+    "VALUES (?, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'))"
+)
+# payment_date is set from SQLite's clock when paid, and cleared otherwise.
+# UPSERT: a user whose queued /start insert never landed still gets a row,
+# so a payment is always stored
+# RETURNING (SQLite 3.35+) hands back the written row in the same
+# statement, so callers need no follow-up read
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_SET_PAID = (
+    "INSERT INTO users (user_id, paid, join_date, payment_date) "
+    "VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime'), "
+    "CASE WHEN ? THEN strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime') END) "
+    "ON CONFLICT(user_id) DO UPDATE SET "
+    "paid = excluded.paid, payment_date = excluded.payment_date"
+    + (" RETURNING user_id, paid, join_date, payment_date" if _HAS_RETURNING else "")
+)
+_SQL_IS_PAID = "SELECT paid FROM users WHERE user_id = ?"
+# Partial index over paid users only: the startup cache warm-up walks this
+# small index instead of scanning the whole table. is_paid needs no index,
+# user_id is the rowid so the lookup already is a single b-tree search.
+_SQL_CREATE_PAID_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_users_paid ON users(user_id) WHERE paid = 1"
+)
+_SQL_PAID_USERS = "SELECT user_id FROM users WHERE paid = 1"
+_SQL_GET_USER = "SELECT user_id, paid, join_date, payment_date FROM users WHERE user_id = ?"
+
+
+def _user_from_row(row: tuple) -> dict:
+    """Convert a (user_id, paid, join_date, payment_date) row to a dict."""
+    return {
+        "user_id": row[0],
+        "paid": bool(row[1]),
+        "join_date": row[2],
+        "payment_date": row[3]
+    }
+
+
+def _batch_key(item: tuple[str, tuple, Optional[asyncio.Future]]) -> tuple[str, bool]:
+    """Group queued writes by statement and by whether a caller awaits them."""
+    return item[0], item[2] is None
+
+
+class SQLitePool:
+    """Bounded pool of pre-opened read connections."""
+
+    __slots__ = ("db_path", "size", "_conns")
+
+    def __init__(self, db_path: str, size: int):
+        """
+        Initialize connection pool.
+
+        Connections are opened by open().
+        
+        Args:
+            db_path: Path to SQLite database file
+            size: Number of connections in the pool
+        """
+        self.db_path = db_path
+        self.size = size
+        # The queue doubles as the semaphore: acquire blocks while it is empty
+        self._conns: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+
+    async def open(self) -> None:
+        """Open and configure all pool connections."""
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+            await conn.executescript(_SQL_PRAGMAS)
+            self._conns.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close all idle pool connections."""
+        while not self._conns.empty():
+            await self._conns.get_nowait().close()
+
+    async def acquire(self) -> aiosqlite.Connection:
+        """Take a connection from the pool, waiting if all are in use."""
+        return await self._conns.get()
+
+    def release(self, conn: aiosqlite.Connection) -> None:
+        """Return a connection to the pool."""
+        self._conns.put_nowait(conn)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for the duration of the block."""
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
 
 class Database:
     """Database class for user management using OOP."""
 
-    def __init__(self, db_path: str):
+    __slots__ = ("db_path", "_conn", "_pool", "_paid_cache", "_write_q", "_writer_task")
+
+    def __init__(self, db_path: str, pool_size: int = 8):
         """
-        Initialize database connection.
+        Initialize database manager.
+
+        The connections themselves are opened by connect(). Writes go
+        through a single connection, reads through a pool so they can run
+        in parallel under WAL.
         
         Args:
             db_path: Path to SQLite database file
+            pool_size: Number of read connections
         """
         self.db_path = db_path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._pool = SQLitePool(db_path, pool_size)
+        # Paid status only ever flips False -> True, so paid users are cached
+        self._paid_cache: set[int] = set()
+        # Writes are queued and committed in batches by _writer()
+        self._write_q: asyncio.Queue[tuple[str, tuple, Optional[asyncio.Future]]] = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        """Open the long-lived write connection and the read pool."""
+        try:
+            # Autocommit mode: transactions are opened explicitly by _writer()
+            self._conn = await aiosqlite.connect(self.db_path, isolation_level=None)
+            await self._conn.executescript(_SQL_PRAGMAS)
+            await self._pool.open()
+            self._writer_task = asyncio.create_task(self._writer())
+            self._writer_task.add_done_callback(self._on_writer_done)
+            logger.info("Database connection opened")
+        except Exception as e:
+            logger.error("Error opening database connection: %s", e)
+            raise
+
+    async def close(self) -> None:
+        """Flush pending writes and close the database connection."""
+        if self._writer_task is not None:
+            await self._write_q.join()
+            self._writer_task.cancel()
+            self._writer_task = None
+        await self._pool.close()
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            logger.info("Database connection closed")
+
+    async def _writer(self) -> None:
+        """Drain the write queue, committing each batch in one transaction."""
+        while True:
+            batch = [await self._write_q.get()]
+            try:
+                # Let concurrent handlers queue their writes into the same batch
+                await asyncio.sleep(_WRITE_BATCH_WINDOW)
+                while len(batch) < _WRITE_BATCH_MAX and not self._write_q.empty():
+                    batch.append(self._write_q.get_nowait())
+                await self._write_batch(batch)
+            finally:
+                # Nobody must be left waiting on a write that was not resolved
+                for _, _, future in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(RuntimeError("Database writer stopped"))
+                for _ in batch:
+                    self._write_q.task_done()
+
+    async def _write_batch(self, batch: list[tuple[str, tuple, Optional[asyncio.Future]]]) -> None:
+        """Commit a batch in one transaction, replaying it statement by statement on failure."""
+        results: list[tuple[asyncio.Future, Optional[tuple]]] = []
+        try:
+            # IMMEDIATE takes the write lock up front instead of upgrading a
+            # deferred transaction later, which can fail with SQLITE_BUSY
+            await self._conn.execute("BEGIN IMMEDIATE")
+            for (sql, fire_and_forget), group in groupby(batch, key=_batch_key):
+                if fire_and_forget:
+                    # Consecutive writes of the same statement (e.g. a burst
+                    # of /start inserts) go to SQLite in one executemany call
+                    await self._conn.executemany(sql, [params for _, params, _ in group])
+                    continue
+                # Awaited writes run one by one so each caller gets the
+                # row its statement returned (None if there is none)
+                for _, params, future in group:
+                    async with self._conn.execute(sql, params) as cursor:
+                        results.append((future, await cursor.fetchone()))
+            await self._conn.commit()
+        except Exception as e:
+            logger.error("Error writing batch of %s statements: %s", len(batch), e)
+            await self._rollback()
+        else:
+            for future, row in results:
+                if not future.done():
+                    future.set_result(row)
+            return
+
+        # One bad statement must not fail everyone else's writes, so each
+        # one is retried in its own transaction
+        for sql, params, future in batch:
+            try:
+                row = await self._write_one(sql, params)
+            except Exception as e:
+                logger.error("Error writing statement with params %s: %s", params, e)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            else:
+                if future is not None and not future.done():
+                    future.set_result(row)
+
+    async def _write_one(self, sql: str, params: tuple) -> Optional[tuple]:
+        """Run a single write in its own transaction and return its first row."""
+        await self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            async with self._conn.execute(sql, params) as cursor:
+                row = await cursor.fetchone()
+            await self._conn.commit()
+        except Exception:
+            await self._rollback()
+            raise
+        return row
+
+    async def _rollback(self) -> None:
+        """Roll back the open transaction without letting errors escape."""
+        try:
+            await self._conn.rollback()
+        except Exception as e:
+            logger.error("Error rolling back write transaction: %s", e)
+
+    def _on_writer_done(self, task: asyncio.Task) -> None:
+        """Fail writes still queued after the writer task has stopped."""
+        if task.cancelled():
+            reason = RuntimeError("Database writer stopped")
+        else:
+            error = task.exception()
+            logger.error("Database writer stopped unexpectedly: %s", error)
+            reason = RuntimeError(f"Database writer stopped: {error}")
+        while not self._write_q.empty():
+            _, _, future = self._write_q.get_nowait()
+            if future is not None and not future.done():
+                future.set_exception(reason)
+            self._write_q.task_done()
+
+    async def _enqueue(self, sql: str, params: tuple, future: Optional[asyncio.Future]) -> None:
+        """Queue a write for the writer task, failing fast if it is not running."""
+        if self._writer_task is None or self._writer_task.done():
+            raise RuntimeError("Database writer is not running")
+        await self._write_q.put((sql, params, future))
 
     async def create_table(self) -> None:
         """Create users table if not exists."""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id INTEGER PRIMARY KEY,
-                        paid BOOLEAN DEFAULT FALSE,
-                        join_date TEXT,
-                        payment_date TEXT
-                    )
-                    """
-                )
-                await db.commit()
-                logger.info("Database table created/verified")
+            await self._conn.execute(_SQL_CREATE)
+            await self._conn.execute(_SQL_CREATE_PAID_INDEX)
+            logger.info("Database table created/verified")
+
+            async with self._conn.execute(_SQL_PAID_USERS) as cursor:
+                self._paid_cache.update(row[0] for row in await cursor.fetchall())
         except Exception as e:
-            logger.error(f"Error creating database table: {e}")
+            logger.error("Error creating database table: %s", e)
             raise
 
     async def add_user(self, user_id: int) -> None:
         """
-        Add new user to database.
+        Queue new user for insertion into database.
+
+        The row is written by the background writer; this call does not
+        wait for the commit.
         
         Args:
             user_id: Telegram user ID
         """
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    "INSERT OR IGNORE INTO users (user_id, join_date) VALUES (?, ?)",
-                    (user_id, datetime.now().isoformat()),
-                )
-                await db.commit()
-                logger.info(f"User {user_id} added to database")
-        except Exception as e:
-            logger.error(f"Error adding user {user_id}: {e}")
-            raise
+        await self._enqueue(_SQL_ADD, (user_id,), None)
+        logger.info("User %s queued for database", user_id)
 
-    async def set_paid(self, user_id: int, paid: bool = True) -> None:
+    async def set_paid(self, user_id: int, paid: bool = True) -> Optional[dict]:
         """
         Set user paid status.
+
+        Waits until the batch containing the update is committed, so a
+        payment is never acknowledged before it is stored.
         
         Args:
             user_id: Telegram user ID
             paid: Payment status (True/False)
+            
+        Returns:
+            Stored user data (the row is created if the user is missing)
         """
         try:
-            payment_date = datetime.now().isoformat() if paid else None
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute(
-                    "UPDATE users SET paid = ?, payment_date = ? WHERE user_id = ?",
-                    (paid, payment_date, user_id),
-                )
-                await db.commit()
-                logger.info(f"User {user_id} paid status set to {paid}")
+            future = asyncio.get_running_loop().create_future()
+            await self._enqueue(_SQL_SET_PAID, (user_id, paid, paid), future)
+            row = await future
+            if paid:
+                self._paid_cache.add(user_id)
+            else:
+                self._paid_cache.discard(user_id)
+            logger.info("User %s paid status set to %s", user_id, paid)
+            if not _HAS_RETURNING:
+                return await self.get_user(user_id)
+            return _user_from_row(row)
         except Exception as e:
-            logger.error(f"Error setting paid status for user {user_id}: {e}")
+            logger.error("Error setting paid status for user %s: %s", user_id, e)
             raise
 
     async def is_paid(self, user_id: int) -> bool:
@@ -89,17 +343,19 @@ class Database:
         Returns:
             True if user has paid, False otherwise
         """
+        if user_id in self._paid_cache:
+            return True
+
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute(
-                    "SELECT paid FROM users WHERE user_id = ?", (user_id,)
-                ) as cursor:
+            async with self._pool.connection() as conn:
+                async with conn.execute(_SQL_IS_PAID, (user_id,)) as cursor:
                     row = await cursor.fetchone()
-                    if row:
-                        return bool(row[0])
-                    return False
+            if row and row[0]:
+                self._paid_cache.add(user_id)
+                return True
+            return False
         except Exception as e:
-            logger.error(f"Error checking paid status for user {user_id}: {e}")
+            logger.error("Error checking paid status for user %s: %s", user_id, e)
             return False
 
     async def get_user(self, user_id: int) -> Optional[dict]:
@@ -113,20 +369,10 @@ class Database:
             Dictionary with user data or None if not found
         """
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                async with db.execute(
-                    "SELECT user_id, paid, join_date, payment_date FROM users WHERE user_id = ?",
-                    (user_id,)
-                ) as cursor:
+            async with self._pool.connection() as conn:
+                async with conn.execute(_SQL_GET_USER, (user_id,)) as cursor:
                     row = await cursor.fetchone()
-                    if row:
-                        return {
-                            "user_id": row[0],
-                            "paid": bool(row[1]),
-                            "join_date": row[2],
-                            "payment_date": row[3]
-                        }
-                    return None
+            return _user_from_row(row) if row else None
         except Exception as e:
-            logger.error(f"Error getting user {user_id}: {e}")
+            logger.error("Error getting user %s: %s", user_id, e)
             return None
@@ -2,10 +2,17 @@
 from aiogram import Bot
 from aiogram.types import LabeledPrice, PreCheckoutQuery
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+INVOICE_TITLE = "Онлайн-курс"
+INVOICE_DESCRIPTION = "Полный доступ к онлайн-курсу"
+INVOICE_PAYLOAD = "course_payment"
+INVOICE_CURRENCY = "RUB"
+INVOICE_START_PARAMETER = "course"
+
 
 class PaymentService:
     """Service for handling payment operations."""
@@ -20,6 +27,19 @@ class PaymentService:
         """
         self.provider_token = provider_token
         self.course_price = course_price
+        # Invoice parameters are fixed for the service lifetime, so the price
+        # model and the request arguments are built once
+        self._prices = [LabeledPrice(label="Курс", amount=course_price * 100)]
+        self._token_valid = bool(provider_token) and len(provider_token) >= 10
+        self._invoice_kwargs = {
+            "title": INVOICE_TITLE,
+            "description": INVOICE_DESCRIPTION,
+            "payload": INVOICE_PAYLOAD,
+            "provider_token": provider_token,
+            "currency": INVOICE_CURRENCY,
+            "prices": self._prices,
+            "start_parameter": INVOICE_START_PARAMETER,
+        }
 
     async def send_invoice(
         self, bot: Bot, user_id: int
@@ -32,24 +52,15 @@ class PaymentService:
             user_id: Telegram user ID
         """
         try:
-            logger.info(f"Attempting to send invoice to user {user_id}")
+            logger.info("Attempting to send invoice to user %s", user_id)
             
-            if not self.provider_token or len(self.provider_token) < 10:
+            if not self._token_valid:
                 raise ValueError("Provider token is empty or invalid")
             
-            await bot.send_invoice(
-                chat_id=user_id,
-                title="Онлайн-курс",
-                description="Полный доступ к онлайн-курсу",
-                payload="course_payment",
-                provider_token=self.provider_token,
-                currency="RUB",
-                prices=[LabeledPrice(label="Курс", amount=self.course_price * 100)],
-                start_parameter="course",
-            )
-            logger.info(f"Invoice sent to user {user_id}")
+            await bot.send_invoice(chat_id=user_id, **self._invoice_kwargs)
+            logger.info("Invoice sent to user %s", user_id)
         except Exception as e:
-            logger.error(f"Error sending invoice to user {user_id}: {e}")
+            logger.error("Error sending invoice to user %s: %s", user_id, e)
             raise
 
     async def process_pre_checkout(
@@ -66,9 +77,9 @@ class PaymentService:
             await bot.answer_pre_checkout_query(
                 pre_checkout_query_id=pre_checkout_query.id, ok=True
             )
-            logger.info(f"Pre-checkout approved for user {pre_checkout_query.from_user.id}")
+            logger.info("Pre-checkout approved for user %s", pre_checkout_query.from_user.id)
         except Exception as e:
-            logger.error(f"Error processing pre-checkout: {e}")
+            logger.error("Error processing pre-checkout: %s", e)
             raise
 
     async def create_invite_link(
@@ -86,30 +97,35 @@ class PaymentService:
             Invite link or None if failed
         """
         try:
-            # Unban user in channel (if previously banned)
-            try:
-                await bot.unban_chat_member(chat_id=channel_id, user_id=user_id)
-                logger.info(f"User {user_id} unbanned in channel {channel_id}")
-            except Exception as e:
-                logger.warning(f"Could not unban user {user_id}: {e}")
+            # Unban user in channel (if previously banned) and create invite link.
+            # The calls are independent, so both requests go out concurrently.
+            unban_result, invite_link = await asyncio.gather(
+                bot.unban_chat_member(chat_id=channel_id, user_id=user_id),
+                bot.create_chat_invite_link(chat_id=channel_id, member_limit=1),
+                return_exceptions=True,
+            )
 
-            # Create invite link
-            try:
-                invite_link = await bot.create_chat_invite_link(
-                    chat_id=channel_id, member_limit=1
+            if isinstance(unban_result, Exception):
+                logger.warning("Could not unban user %s: %s", user_id, unban_result)
+            else:
+                logger.info("User %s unbanned in channel %s", user_id, channel_id)
+
+            if isinstance(invite_link, Exception):
+                error_msg = str(invite_link)
+                logger.error(
+                    "Error creating invite link for channel %s: %s", channel_id, invite_link
                 )
-                link = invite_link.invite_link
-                logger.info(f"Invite link created for user {user_id}: {link}")
-                return link
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Error creating invite link for channel {channel_id}: {e}")
                 if "chat not found" in error_msg.lower() or "chat_id" in error_msg.lower():
                     logger.error(
-                        f"Channel {channel_id} not found or bot is not admin. "
-                        f"Please check CHANNEL_ID in .env"
+                        "Channel %s not found or bot is not admin. "
+                        "Please check CHANNEL_ID in .env",
+                        channel_id,
                     )
                 return None
+
+            link = invite_link.invite_link
+            logger.info("Invite link created for user %s: %s", user_id, link)
+            return link
         except Exception as e:
-            logger.error(f"Error creating invite link for user {user_id}: {e}")
+            logger.error("Error creating invite link for user %s: %s", user_id, e)
             return None
@@ -2,11 +2,18 @@
 from aiogram import Bot
 from typing import Optional
 import logging
+import time
 
 from src.database.models import Database
 
 logger = logging.getLogger(__name__)
 
+# Unpaid status cache: entries live for _STATUS_TTL seconds, the cache is
+# cleared when it grows past _STATUS_CACHE_MAX users. Paid users are
+# already cached for good by Database, so only negative results go here
+_STATUS_TTL = 30.0
+_STATUS_CACHE_MAX = 10_000
+
 
 class UserService:
     """Service for handling user operations."""
@@ -19,6 +26,8 @@ class UserService:
             db: Database instance
         """
         self.db = db
+        # user_id -> expiry time of the unpaid status on the monotonic clock
+        self._unpaid_cache: dict[int, float] = {}
 
     async def register_user(self, user_id: int) -> None:
         """
@@ -29,9 +38,9 @@ class UserService:
         """
         try:
             await self.db.add_user(user_id)
-            logger.info(f"User {user_id} registered")
+            logger.info("User %s registered", user_id)
         except Exception as e:
-            logger.error(f"Error registering user {user_id}: {e}")
+            logger.error("Error registering user %s: %s", user_id, e)
             raise
 
     async def check_payment_status(self, user_id: int) -> bool:
@@ -44,7 +53,23 @@ class UserService:
         Returns:
             True if user has paid, False otherwise
         """
-        return await self.db.is_paid(user_id)
+        now = time.monotonic()
+        expires = self._unpaid_cache.get(user_id)
+        if expires is not None and expires > now:
+            return False
+        
+        paid = await self.db.is_paid(user_id)
+        if paid:
+            self._unpaid_cache.pop(user_id, None)
+        else:
+            self._cache_unpaid(user_id, now)
+        return paid
+
+    def _cache_unpaid(self, user_id: int, now: float) -> None:
+        """Remember an unpaid status for _STATUS_TTL seconds."""
+        if len(self._unpaid_cache) >= _STATUS_CACHE_MAX:
+            self._unpaid_cache.clear()
+        self._unpaid_cache[user_id] = now + _STATUS_TTL
 
     async def process_payment(
         self, user_id: int, bot: Bot, channel_id: str, payment_service
@@ -61,20 +86,17 @@ class UserService:
         Returns:
             Invite link or None if failed
         """
+        # Store the payment before the user is unbanned and given a link;
+        # unban and link creation run concurrently inside PaymentService
         try:
-            # Update database
             await self.db.set_paid(user_id, paid=True)
-            logger.info(f"Payment processed for user {user_id}")
-            
-            # Create invite link
-            invite_link = await payment_service.create_invite_link(
-                bot, channel_id, user_id
-            )
-            
-            return invite_link
         except Exception as e:
-            logger.error(f"Error processing payment for user {user_id}: {e}")
+            logger.error("Error processing payment for user %s: %s", user_id, e)
             return None
+        self._unpaid_cache.pop(user_id, None)
+        logger.info("Payment processed for user %s", user_id)
+        
+        return await payment_service.create_invite_link(bot, channel_id, user_id)
 
     async def get_user_info(self, user_id: int) -> Optional[dict]:
         """
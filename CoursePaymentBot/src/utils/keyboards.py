@@ -1,16 +1,23 @@
 """Inline keyboards for bot."""
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+# Keyboards are built once and the same objects are returned on every call.
+# aiogram markups are mutable pydantic models: callers must not modify them.
+_TRIAL = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="🎁 Пробный урок", callback_data="trial")]
+    ]
+)
+
 
 def trial_btn() -> InlineKeyboardMarkup:
     """Trial lesson button."""
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="🎁 Пробный урок", callback_data="trial")]
-        ]
-    )
+    return _TRIAL
 
 
+@lru_cache(maxsize=8)
 def buy_btn(course_price: int = 990) -> InlineKeyboardMarkup:
     """
     Buy course button.
@@ -19,7 +26,7 @@ def buy_btn(course_price: int = 990) -> InlineKeyboardMarkup:
         course_price: Course price in rubles
         
     Returns:
-        InlineKeyboardMarkup with buy button
+        InlineKeyboardMarkup with buy button (shared, must not be modified)
     """
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -28,6 +35,7 @@ def buy_btn(course_price: int = 990) -> InlineKeyboardMarkup:
     )
 
 
+@lru_cache(maxsize=8)
 def main_menu(course_price: int = 990) -> InlineKeyboardMarkup:
     """
     Main menu with trial and buy buttons.
@@ -36,7 +44,7 @@ def main_menu(course_price: int = 990) -> InlineKeyboardMarkup:
         course_price: Course price in rubles
         
     Returns:
-        InlineKeyboardMarkup with main menu
+        InlineKeyboardMarkup with main menu (shared, must not be modified)
     """
     return InlineKeyboardMarkup(
         inline_keyboard=[
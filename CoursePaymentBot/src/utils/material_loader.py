@@ -1,5 +1,6 @@
 """Utility for loading materials."""
 from pathlib import Path
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,10 +17,15 @@ class MaterialLoader:
             materials_dir: Directory with materials
         """
         self.materials_dir = Path(materials_dir)
+        # Trial lesson content and the file mtime it was read at
+        self._cached: Optional[str] = None
+        self._cached_mtime: Optional[int] = None
 
     def load_trial_lesson(self) -> str:
         """
         Load trial lesson content.
+
+        The content is cached and re-read only when the file mtime changes.
         
         Returns:
             Trial lesson content as string
@@ -29,12 +35,17 @@ class MaterialLoader:
         """
         trial_file = self.materials_dir / "trial_lesson.md"
         
-        if not trial_file.exists():
-            raise FileNotFoundError(f"Trial lesson file not found: {trial_file}")
+        try:
+            mtime = trial_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Trial lesson file not found: {trial_file}") from None
+        
+        if mtime == self._cached_mtime:
+            return self._cached
         
         try:
-            with open(trial_file, "r", encoding="utf-8") as f:
-                content = f.read()
+            content = trial_file.read_bytes().decode("utf-8")
+            self._cached, self._cached_mtime = content, mtime
             logger.info("Trial lesson loaded successfully")
             return content
         except Exception as e:
@@ -3,48 +3,153 @@
 """
 import requests
 import logging
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime, timedelta
+from types import MappingProxyType
+
+from .http_session import create_session, json_dumps, json_loads
+from .retry import backoff_delay
+
+# Значения по умолчанию для отсутствующих полей ответа: общие неизменяемые
+# объекты вместо нового {} / [] на каждый товар в цикле разбора
+_NO_PRODUCT = MappingProxyType({})
+_NO_HISTORY = ()
+
+# Размер части списка nmIds для одного запроса grouped/history и
+# максимальное число одновременных запросов (ограничение из-за rate limit)
+_GROUPED_CHUNK_SIZE = 50
+_MAX_PARALLEL_REQUESTS = 5
+
+# Лимит API products/history - не более 20 nmIds в одном запросе
+_DETAILED_CHUNK_SIZE = 20
 
 
 class WBAnalyticsClient:
     """Класс для работы с Analytics API Wildberries"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None):
         """
         Инициализация клиента Analytics API
         
         Args:
             api_key: API ключ для авторизации
+            session: Общая HTTP-сессия (если не указана, создается своя)
         """
         self.api_key = api_key
         self.base_url_grouped = "https://seller-analytics-api.wildberries.ru/api/analytics/v3/sales-funnel/grouped/history"
         self.base_url_products = "https://seller-analytics-api.wildberries.ru/api/analytics/v3/sales-funnel/products/history"
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        })
+        self.session = session or create_session(api_key)
+        # Сброшен, пока один из параллельных запросов ждет после 429
+        self._rate_limit_clear = threading.Event()
+        self._rate_limit_clear.set()
+    
+    def _log_request_error(self, error: requests.exceptions.RequestException, attempt: int, max_retries: int) -> None:
+        """
+        Логирует ошибку запроса к Analytics API
+        
+        Args:
+            error: Исключение requests
+            attempt: Номер неудачной попытки (начиная с 1)
+            max_retries: Максимальное количество попыток
+        """
+        if isinstance(error, requests.exceptions.Timeout):
+            self.logger.warning(f"Таймаут при запросе к Analytics API (попытка {attempt}/{max_retries})")
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            self.logger.warning(f"Ошибка соединения с Analytics API (попытка {attempt}/{max_retries}): {error}")
+        else:
+            self.logger.error(f"Ошибка при запросе к Analytics API (попытка {attempt}/{max_retries}): {error}")
+    
+    def _sleep_before_retry(self, retry_delay: int, attempt: int) -> None:
+        """
+        Ждет перед повторной попыткой: экспоненциальная задержка со случайным
+        разбросом, чтобы повторы разных клиентов не совпадали по времени
+        
+        Args:
+            retry_delay: Базовая задержка в секундах
+            attempt: Номер неудачной попытки (начиная с 1)
+        """
+        delay = backoff_delay(attempt, retry_delay)
+        self.logger.info(f"Повторная попытка через {delay:.1f} секунд...")
+        time.sleep(delay)
+    
+    def _pause_for_rate_limit(self, response: requests.Response, retry_delay: int, attempt: int) -> None:
+        """
+        Ждет после ответа 429, приостанавливая на это время запросы всех потоков
+        
+        Args:
+            response: Ответ со статусом 429
+            retry_delay: Базовая задержка в секундах (если нет Retry-After)
+            attempt: Номер неудачной попытки (начиная с 1)
+        """
+        # Без заголовка Retry-After ждем по общей схеме backoff
+        retry_after = response.headers.get('Retry-After')
+        delay = int(retry_after) if retry_after else backoff_delay(attempt, retry_delay)
+        self.logger.warning(f"Rate limit (429), ждем {delay:.0f} секунд...")
+        self._rate_limit_clear.clear()
+        try:
+            time.sleep(delay)
+        finally:
+            self._rate_limit_clear.set()
     
-    def get_product_views_for_date(self, date: str = None, nm_ids: Optional[List[int]] = None, max_retries: int = 3, retry_delay: int = 10) -> Dict[str, int]:
+    def get_product_views_for_date(self, date: str = None, nm_ids: Optional[Iterable[int]] = None, max_retries: int = 3, retry_delay: int = 10) -> Dict[str, int]:
         """
         Получает количество просмотров карточек товаров за указанную дату
         
         Args:
             date: Дата в формате YYYY-MM-DD (если None, используется сегодня)
-            nm_ids: Опциональный список nmId для фильтрации (может помочь получить детализацию)
+            nm_ids: Опциональные nmId для фильтрации (может помочь получить детализацию)
             max_retries: Максимальное количество попыток
             retry_delay: Задержка между попытками в секундах
             
         Returns:
             Dict[str, int]: Словарь {vendorCode: openCount}, только с ненулевыми значениями
         """
-        import time
-        
         if date is None:
-            date = datetime.utcnow().strftime('%Y-%m-%d')
+            date = datetime.utcnow().date().isoformat()
+        
+        # Убираем дубли и сортируем: payload получается меньше и одинаковым
+        # для одного и того же набора товаров
+        nm_ids = sorted(set(nm_ids)) if nm_ids else None
+        
+        if not nm_ids or len(nm_ids) <= _GROUPED_CHUNK_SIZE:
+            return dict(self._fetch_grouped_views(date, nm_ids, max_retries, retry_delay))
         
+        # Большой список nmIds делим на части и запрашиваем их параллельно,
+        # результаты частей суммируем. Ошибка одной части не отменяет остальные
+        chunks = [nm_ids[i:i + _GROUPED_CHUNK_SIZE] for i in range(0, len(nm_ids), _GROUPED_CHUNK_SIZE)]
+        self.logger.info(f"Запрос статистики просмотров за {date}: {len(nm_ids)} товаров, {len(chunks)} частей")
+        
+        views_stats = Counter()
+        with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL_REQUESTS, len(chunks))) as executor:
+            futures = {
+                executor.submit(self._fetch_grouped_views, date, chunk, max_retries, retry_delay): number
+                for number, chunk in enumerate(chunks, 1)
+            }
+            for future in as_completed(futures):
+                try:
+                    views_stats.update(future.result())
+                except Exception as e:
+                    self.logger.error(f"Ошибка при обработке части {futures[future]}/{len(chunks)}: {e}")
+        return dict(views_stats)
+    
+    def _fetch_grouped_views(self, date: str, nm_ids: Optional[List[int]], max_retries: int, retry_delay: int) -> Counter:
+        """
+        Выполняет один запрос к grouped/history и собирает просмотры
+        
+        Args:
+            date: Дата в формате YYYY-MM-DD
+            nm_ids: nmId для фильтрации или None
+            max_retries: Максимальное количество попыток
+            retry_delay: Задержка между попытками в секундах
+            
+        Returns:
+            Counter: {идентификатор товара: openCount}, только ненулевые значения
+        """
         # Формируем запрос для одного дня
         payload = {
             "selectedPeriod": {
@@ -60,142 +165,148 @@ class WBAnalyticsClient:
         # payload["groupBySa"] = True
         
         # Вариант 2: передача nmIds для фильтрации (может помочь получить детализацию)
-        if nm_ids and len(nm_ids) > 0:
+        if nm_ids:
             payload["nmIds"] = nm_ids
-            self.logger.debug(f"Используется фильтрация по nmIds: {len(nm_ids)} товаров")
+            self.logger.debug("Используется фильтрация по nmIds: %s товаров", len(nm_ids))
         
-        self.logger.debug(f"Payload запроса (первые 200 символов): {str(payload)[:200]}")
+        self.logger.debug("Payload запроса (первые 200 символов): %.200s", payload)
         
         for attempt in range(1, max_retries + 1):
             try:
                 self.logger.info(f"Запрос статистики просмотров за {date} (попытка {attempt}/{max_retries})")
-                response = self.session.post(self.base_url_grouped, json=payload, timeout=30)
+                
+                # Если другой поток получил 429, ждем окончания паузы
+                self._rate_limit_clear.wait()
+                response = self.session.post(self.base_url_grouped, data=json_dumps(payload), timeout=30)
+                
+                # Обработка rate limiting (429)
+                if response.status_code == 429:
+                    self._pause_for_rate_limit(response, retry_delay, attempt)
+                    if attempt < max_retries:
+                        continue
+                    self.logger.error("Превышен лимит запросов после нескольких попыток. Возвращаем пустой результат.")
+                    return Counter()
+                
                 response.raise_for_status()
                 
-                data = response.json()
-                products_data = data.get("data", [])
+                data = json_loads(response.content)
+                products_data = data.get("data", _NO_HISTORY)
                 
-                self.logger.debug(f"Полный ответ API (первые 500 символов): {str(data)[:500]}")
-                self.logger.debug(f"Получено продуктов в ответе: {len(products_data)}")
+                # %.500s: str() всего ответа строится только при включенном DEBUG
+                self.logger.debug("Полный ответ API (первые 500 символов): %.500s", data)
+                self.logger.debug("Получено продуктов в ответе: %s", len(products_data))
                 
-                # Собираем статистику просмотров
-                views_stats = {}
-                total_products = 0
+                # Собираем статистику просмотров за один проход;
+                # Counter суммирует записи с одинаковым идентификатором
+                views_stats = Counter()
                 products_with_history = 0
                 
                 for product_data in products_data:
-                    total_products += 1
-                    product = product_data.get("product", {})
-                    vendor_code = product.get("vendorCode", "").strip()
-                    nm_id = product.get("nmId")
-                    history = product_data.get("history", [])
-                    
+                    history = product_data.get("history")
                     if not history:
-                        self.logger.debug(f"Продукт без истории: nmId={nm_id}, vendorCode={vendor_code}")
                         continue
-                    
                     products_with_history += 1
                     
-                    # Берем данные за указанную дату
-                    for day_data in history:
-                        day_date = day_data.get("date")
-                        if day_date == date:
-                            open_count = day_data.get("openCount", 0)
-                            
-                            # Если vendorCode пустой, используем nmId или "Общее"
-                            if not vendor_code:
-                                if nm_id and nm_id > 0:
-                                    identifier = f"nmId_{nm_id}"
-                                else:
-                                    # Агрегированные данные - показываем как "Общее"
-                                    identifier = "Общее"
-                            else:
-                                identifier = vendor_code
-                            
-                            self.logger.debug(f"Продукт {identifier}, дата {day_date}, openCount: {open_count}")
-                            
-                            if open_count > 0:
-                                # Если уже есть запись с таким идентификатором, суммируем
-                                if identifier in views_stats:
-                                    views_stats[identifier] += open_count
-                                else:
-                                    views_stats[identifier] = open_count
-                            break
-                    else:
-                        # Если не нашли данные за нужную дату
-                        identifier = vendor_code or (f"nmId_{nm_id}" if nm_id else "N/A")
-                        self.logger.debug(f"Продукт {identifier} - нет данных за {date}, доступные даты: {[d.get('date') for d in history]}")
+                    # Берем данные за указанную дату через индекс {дата: openCount}
+                    by_date = {d["date"]: d.get("openCount", 0) for d in history if "date" in d}
+                    open_count = by_date.get(date)
+                    if not open_count or open_count <= 0:
+                        continue
+                    
+                    # Если vendorCode пустой, используем nmId или "Общее"
+                    # (агрегированные данные)
+                    product = product_data.get("product", _NO_PRODUCT)
+                    nm_id = product.get("nmId")
+                    identifier = (
+                        (product.get("vendorCode") or "").strip()
+                        or (f"nmId_{nm_id}" if nm_id and nm_id > 0 else "Общее")
+                    )
+                    views_stats[identifier] += open_count
                 
-                self.logger.info(f"Обработано продуктов: {total_products}, с историей: {products_with_history}, с просмотрами: {len(views_stats)}")
+                self.logger.info(f"Обработано продуктов: {len(products_data)}, с историей: {products_with_history}, с просмотрами: {len(views_stats)}")
                 
-                if len(views_stats) == 0 and products_with_history > 0:
+                if (len(views_stats) == 0 and products_with_history > 0
+                        and self.logger.isEnabledFor(logging.DEBUG)):
                     # Логируем пример данных для отладки
-                    if products_data:
-                        example_product = products_data[0]
-                        self.logger.debug(f"Пример структуры продукта: nmId={example_product.get('product', {}).get('nmId')}, "
-                                        f"история: {len(example_product.get('history', []))} записей")
-                        if example_product.get('history'):
-                            example_history = example_product.get('history')[0]
-                            self.logger.debug(f"Пример записи истории: {example_history}")
+                    example_product = products_data[0]
+                    self.logger.debug("Пример структуры продукта: nmId=%s, история: %s записей",
+                                      example_product.get('product', {}).get('nmId'),
+                                      len(example_product.get('history', [])))
+                    if example_product.get('history'):
+                        self.logger.debug("Пример записи истории: %s", example_product['history'][0])
                 
                 return views_stats
                 
-            except requests.exceptions.Timeout:
-                self.logger.warning(f"Таймаут при запросе к Analytics API (попытка {attempt}/{max_retries})")
-                if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
-                else:
-                    raise
-            except requests.exceptions.ConnectionError as e:
-                self.logger.warning(f"Ошибка соединения с Analytics API (попытка {attempt}/{max_retries}): {e}")
-                if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
-                else:
-                    raise
             except requests.exceptions.RequestException as e:
-                self.logger.error(f"Ошибка при запросе к Analytics API (попытка {attempt}/{max_retries}): {e}")
-                if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
-                else:
+                self._log_request_error(e, attempt, max_retries)
+                if attempt >= max_retries:
                     raise
+                self._sleep_before_retry(retry_delay, attempt)
             except Exception as e:
                 self.logger.error(f"Неожиданная ошибка при обработке ответа Analytics API: {e}")
                 raise
         
-        return {}
+        return Counter()
     
-    def get_product_views_detailed_for_date(self, date: str = None, nm_ids: Optional[List[int]] = None, max_retries: int = 3, retry_delay: int = 10) -> Dict[str, int]:
+    def get_product_views_detailed_for_date(self, date: str = None, nm_ids: Optional[Iterable[int]] = None, max_retries: int = 3, retry_delay: int = 10) -> Dict[str, int]:
         """
         Получает детализированную статистику просмотров карточек товаров за указанную дату
-        Использует endpoint /products/history для получения данных с vendorCode
+        Использует endpoint /products/history для получения данных с vendorCode.
+        Больше 20 nmIds запрашиваются частями по 20 параллельно
         
         Args:
             date: Дата в формате YYYY-MM-DD (если None, используется сегодня)
-            nm_ids: Опциональный список nmId для фильтрации (если None или пустой, запрашивает все товары)
+            nm_ids: Опциональные nmId для фильтрации (если None или пустой, запрашивает все товары)
             max_retries: Максимальное количество попыток
             retry_delay: Задержка между попытками в секундах
             
         Returns:
             Dict[str, int]: Словарь {vendorCode: openCount}, только с ненулевыми значениями
         """
-        import time
-        
         if date is None:
-            date = datetime.utcnow().strftime('%Y-%m-%d')
+            date = datetime.utcnow().date().isoformat()
         
-        # Нужны реальные nmIds для запроса (до 20 артикулов за раз)
-        if not nm_ids or len(nm_ids) == 0:
+        # Нужны реальные nmIds для запроса; дубли убираем сразу
+        nm_ids = sorted(set(nm_ids)) if nm_ids else None
+        if not nm_ids:
             self.logger.warning("nmIds не указаны. Нужно получить список товаров через Content API.")
             return {}
         
-        # Ограничиваем до 20 артикулов за запрос (лимит API - max 20)
-        if len(nm_ids) > 20:
-            self.logger.warning(f"Слишком много nmIds ({len(nm_ids)}), используем первые 20")
-            nm_ids = nm_ids[:20]
+        if len(nm_ids) <= _DETAILED_CHUNK_SIZE:
+            return dict(self._fetch_detailed_views(date, nm_ids, max_retries, retry_delay))
+        
+        # Лимит API - max 20 артикулов за запрос: делим список на части и
+        # запрашиваем их параллельно. Ошибка одной части не отменяет остальные
+        chunks = [nm_ids[i:i + _DETAILED_CHUNK_SIZE] for i in range(0, len(nm_ids), _DETAILED_CHUNK_SIZE)]
+        self.logger.info(f"Товаров: {len(nm_ids)}, запрашиваем {len(chunks)} частей по {_DETAILED_CHUNK_SIZE}")
+        
+        views_stats = Counter()
+        with ThreadPoolExecutor(max_workers=min(_MAX_PARALLEL_REQUESTS, len(chunks))) as executor:
+            futures = {
+                executor.submit(self._fetch_detailed_views, date, chunk, max_retries, retry_delay): number
+                for number, chunk in enumerate(chunks, 1)
+            }
+            for future in as_completed(futures):
+                try:
+                    views_stats.update(future.result())
+                except Exception as e:
+                    self.logger.error(f"Ошибка при обработке части {futures[future]}/{len(chunks)}: {e}")
         
+        return dict(views_stats)
+    
+    def _fetch_detailed_views(self, date: str, nm_ids: List[int], max_retries: int, retry_delay: int) -> Counter:
+        """
+        Выполняет один запрос к products/history (не более 20 nmIds)
+        
+        Args:
+            date: Дата в формате YYYY-MM-DD
+            nm_ids: nmId для запроса
+            max_retries: Максимальное количество попыток
+            retry_delay: Задержка между попытками в секундах
+            
+        Returns:
+            Counter: {vendorCode: openCount}, только ненулевые значения
+        """
         # Формируем запрос с selectedPeriod (как требует API)
         payload = {
             "nmIds": nm_ids,
@@ -207,38 +318,38 @@ class WBAnalyticsClient:
             "aggregationLevel": "day"
         }
         
-        self.logger.debug(f"Запрос для {len(nm_ids)} товаров за {date}")
+        self.logger.debug("Запрос для %s товаров за %s", len(nm_ids), date)
         
         for attempt in range(1, max_retries + 1):
             try:
                 self.logger.info(f"Запрос детализированной статистики просмотров за {date} (попытка {attempt}/{max_retries})")
                 
+                # Если другой поток получил 429, ждем окончания паузы
+                self._rate_limit_clear.wait()
                 # Используем только рабочий URL (seller-analytics-api)
-                response = self.session.post(self.base_url_products, json=payload, timeout=30)
+                response = self.session.post(self.base_url_products, data=json_dumps(payload), timeout=30)
                 
                 # Обработка rate limiting (429)
                 if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', 60))  # Увеличено с 30 до 60
-                    self.logger.warning(f"Rate limit (429), ждем {retry_after} секунд...")
-                    time.sleep(retry_after)
+                    self._pause_for_rate_limit(response, retry_delay, attempt)
                     # Продолжаем цикл попыток
                     if attempt < max_retries:
                         continue
                     else:
                         # Если после всех попыток все еще 429, возвращаем пустой результат
                         self.logger.error("Превышен лимит запросов после нескольких попыток. Возвращаем пустой результат.")
-                        return {}
+                        return Counter()
                 
                 # Логируем ошибки для отладки
                 if response.status_code != 200:
                     error_text = response.text[:500] if response.text else "No error text"
                     self.logger.error(f"Ошибка API (status {response.status_code}): {error_text}")
-                    self.logger.debug(f"Payload запроса: {payload}")
+                    self.logger.debug("Payload запроса: %s", payload)
                 
                 response.raise_for_status()
                 
                 # Ответ в формате {"data": [...]} или просто массив
-                response_data = response.json()
+                response_data = json_loads(response.content)
                 
                 # Проверяем структуру ответа
                 if isinstance(response_data, dict) and "data" in response_data:
@@ -247,75 +358,69 @@ class WBAnalyticsClient:
                     data = response_data
                 else:
                     self.logger.error(f"Неожиданная структура ответа: {type(response_data)}")
-                    return {}
+                    return Counter()
                 
-                self.logger.debug(f"Полный ответ API (первые 500 символов): {str(data)[:500]}")
-                self.logger.debug(f"Получено записей в ответе: {len(data)}")
+                # %.500s: str() всего ответа строится только при включенном DEBUG
+                self.logger.debug("Полный ответ API (первые 500 символов): %.500s", data)
+                self.logger.debug("Получено записей в ответе: %s", len(data))
                 
                 # Структура ответа: [{"product": {...}, "history": [...]}]
-                # где history содержит записи с openCount за даты
-                views_stats = {}
+                # где history содержит записи с openCount за даты;
+                # Counter суммирует записи с одинаковым vendorCode
+                views_stats = Counter()
+                # Проверяем уровень один раз, а не на каждый товар в цикле
+                debug = self.logger.isEnabledFor(logging.DEBUG)
                 
                 for product_data in data:
-                    product = product_data.get("product", {})
+                    product = product_data.get("product", _NO_PRODUCT)
                     vendor_code = product.get("vendorCode", "").strip()
                     nm_id = product.get("nmId")
-                    history = product_data.get("history", [])
+                    history = product_data.get("history", _NO_HISTORY)
                     
                     # Если нет vendorCode, используем nmId как идентификатор
                     if not vendor_code and nm_id:
                         vendor_code = f"nmId_{nm_id}"
                     elif not vendor_code:
-                        self.logger.debug(f"Пропущен продукт без vendorCode и nmId")
+                        if debug:
+                            self.logger.debug("Пропущен продукт без vendorCode и nmId")
                         continue
                     
                     if not history:
-                        self.logger.debug(f"Продукт {vendor_code} без истории")
+                        if debug:
+                            self.logger.debug("Продукт %s без истории", vendor_code)
                         continue
                     
-                    # Ищем данные за указанную дату в history
-                    for day_data in history:
-                        day_date = day_data.get("date")
-                        if day_date == date:
-                            # Используем openCount (может быть также shows в некоторых случаях)
-                            open_count = day_data.get("openCount", day_data.get("shows", 0))
-                            
-                            self.logger.debug(f"Продукт {vendor_code}, дата {day_date}, openCount: {open_count}")
-                            
-                            if open_count > 0:
-                                if vendor_code in views_stats:
-                                    views_stats[vendor_code] += open_count
-                                else:
-                                    views_stats[vendor_code] = open_count
-                            break
+                    # Берем данные за указанную дату через индекс {дата: запись}
+                    by_date = {d["date"]: d for d in history if "date" in d}
+                    day_data = by_date.get(date)
+                    if day_data is None:
+                        continue
+
+                    # Используем openCount (может быть также shows в некоторых случаях)
+                    open_count = day_data.get("openCount")
+                    if open_count is None:
+                        open_count = day_data.get("shows", 0)
+
+                    if debug:
+                        self.logger.debug("Продукт %s, дата %s, openCount: %s", vendor_code, date, open_count)
+
+                    if open_count > 0:
+                        views_stats[vendor_code] += open_count
                 
                 self.logger.info(f"Обработано записей: {len(data)}, с просмотрами: {len(views_stats)}")
                 
                 return views_stats
                 
-            except requests.exceptions.Timeout:
-                self.logger.warning(f"Таймаут при запросе к Analytics API (попытка {attempt}/{max_retries})")
-                if attempt < max_retries:
-                    time.sleep(retry_delay)
-                else:
-                    raise
-            except requests.exceptions.ConnectionError as e:
-                self.logger.warning(f"Ошибка соединения с Analytics API (попытка {attempt}/{max_retries}): {e}")
-                if attempt < max_retries:
-                    time.sleep(retry_delay)
-                else:
-                    raise
             except requests.exceptions.RequestException as e:
-                self.logger.error(f"Ошибка при запросе к Analytics API (попытка {attempt}/{max_retries}): {e}")
-                if attempt < max_retries:
-                    time.sleep(retry_delay)
-                else:
+                self._log_request_error(e, attempt, max_retries)
+                if attempt >= max_retries:
                     raise
+                self._sleep_before_retry(retry_delay, attempt)
             except Exception as e:
                 self.logger.error(f"Неожиданная ошибка при обработке ответа Analytics API: {e}")
                 raise
         
-        return {}
+        return Counter()
     
     def test_connection(self) -> bool:
         """
@@ -326,7 +431,7 @@ class WBAnalyticsClient:
         """
         try:
             # Пробуем получить данные за вчерашний день
-            yesterday = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d')
+            yesterday = (datetime.utcnow().date() - timedelta(days=1)).isoformat()
             self.get_product_views_for_date(yesterday)
             return True
         except Exception as e:
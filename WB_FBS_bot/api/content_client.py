@@ -6,25 +6,25 @@ import logging
 from typing import List, Dict, Optional
 import time
 
+from .http_session import create_session, json_dumps, json_loads
+from .retry import backoff_delay
+
 
 class WBContentClient:
     """Класс для работы с Content API Wildberries"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None):
         """
         Инициализация клиента Content API
         
         Args:
             api_key: API ключ для авторизации
+            session: Общая HTTP-сессия (если не указана, создается своя)
         """
         self.api_key = api_key
         self.base_url = "https://content-api.wildberries.ru/content/v2/get/cards/list"
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        })
+        self.session = session or create_session(api_key)
     
     def get_all_cards(self, max_retries: int = 3, retry_delay: int = 10) -> List[Dict]:
         """
@@ -54,34 +54,36 @@ class WBContentClient:
             
             for attempt in range(1, max_retries + 1):
                 try:
-                    self.logger.debug(f"Запрос карточек (попытка {attempt}/{max_retries}), limit: {cursor.get('limit', 100)}")
-                    response = self.session.post(self.base_url, json=payload, timeout=30)
+                    self.logger.debug("Запрос карточек (попытка %s/%s), limit: %s", attempt, max_retries, cursor.get('limit', 100))
+                    response = self.session.post(self.base_url, data=json_dumps(payload), timeout=30)
                     
                     # Обработка rate limiting
                     if response.status_code == 429:
-                        retry_after = int(response.headers.get('Retry-After', 30))  # Увеличено с 10 до 30
-                        self.logger.warning(f"Rate limit (429), ждем {retry_after} секунд...")
-                        time.sleep(retry_after)
+                        # Без заголовка Retry-After ждем по общей схеме backoff
+                        retry_after = response.headers.get('Retry-After')
+                        delay = int(retry_after) if retry_after else backoff_delay(attempt, retry_delay)
+                        self.logger.warning(f"Rate limit (429), ждем {delay:.0f} секунд...")
+                        time.sleep(delay)
                         continue  # Повторяем попытку
                     
                     # Обработка ошибки 500
                     if response.status_code == 500:
                         self.logger.error(f"Ошибка сервера (500) при запросе карточек (попытка {attempt}/{max_retries})")
                         if attempt < max_retries:
-                            time.sleep(retry_delay * 2)  # Увеличиваем задержку при 500
+                            time.sleep(backoff_delay(attempt, retry_delay * 2))  # Увеличиваем задержку при 500
                             continue
                         else:
                             raise requests.exceptions.RequestException(f"Сервер вернул ошибку 500 после {max_retries} попыток")
                     
                     response.raise_for_status()
                     
-                    data = response.json()
+                    data = json_loads(response.content)
                     cards = data.get("cards", [])
                     cursor_info = data.get("cursor", {})
                     
                     all_cards.extend(cards)
                     
-                    self.logger.debug(f"Получено карточек: {len(cards)}, всего: {len(all_cards)}")
+                    self.logger.debug("Получено карточек: %s, всего: %s", len(cards), len(all_cards))
                     
                     # Проверяем, нужно ли продолжать пагинацию
                     total = cursor_info.get("total", 0)
@@ -109,19 +111,19 @@ class WBContentClient:
                 except requests.exceptions.Timeout:
                     self.logger.warning(f"Таймаут при запросе карточек (попытка {attempt}/{max_retries})")
                     if attempt < max_retries:
-                        time.sleep(retry_delay)
+                        time.sleep(backoff_delay(attempt, retry_delay))
                     else:
                         raise
                 except requests.exceptions.ConnectionError as e:
                     self.logger.warning(f"Ошибка соединения (попытка {attempt}/{max_retries}): {e}")
                     if attempt < max_retries:
-                        time.sleep(retry_delay)
+                        time.sleep(backoff_delay(attempt, retry_delay))
                     else:
                         raise
                 except requests.exceptions.RequestException as e:
                     self.logger.error(f"Ошибка при запросе карточек (попытка {attempt}/{max_retries}): {e}")
                     if attempt < max_retries:
-                        time.sleep(retry_delay)
+                        time.sleep(backoff_delay(attempt, retry_delay))
                     else:
                         raise
         
@@ -135,15 +137,13 @@ class WBContentClient:
             List[str]: Список vendorCode (отсортированный, уникальный)
         """
         cards = self.get_all_cards()
-        vendor_codes = []
         
-        for card in cards:
-            vendor_code = card.get("vendorCode", "").strip()
-            if vendor_code:
-                vendor_codes.append(vendor_code)
-        
-        # Удаляем дубликаты и сортируем
-        unique_vendor_codes = sorted(list(set(vendor_codes)))
+        # Собираем непустые vendorCode сразу в множество (без дубликатов)
+        # и сортируем
+        unique_vendor_codes = sorted({
+            vendor_code for card in cards
+            if (vendor_code := card.get("vendorCode", "").strip())
+        })
         self.logger.info(f"Получено уникальных vendorCode: {len(unique_vendor_codes)}")
         
         return unique_vendor_codes
@@ -0,0 +1,49 @@
+"""
+Модуль для создания HTTP-сессий клиентов API Wildberries
+"""
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    # Если orjson не установлен, используем стандартный парсер
+    import json
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> bytes:
+        """Сериализует объект в JSON (UTF-8), как orjson.dumps"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def create_session(api_key: Optional[str] = None) -> requests.Session:
+    """
+    Создает сессию с авторизацией и настроенным пулом keep-alive соединений
+    
+    Пул рассчитан на параллельные запросы одного клиента: соединения
+    переиспользуются между запросами и повторными попытками, поэтому
+    TCP/TLS рукопожатие выполняется один раз на соединение. Повторы на
+    уровне urllib3 отключены - клиенты повторяют запросы сами с backoff.
+    Сессию можно передать нескольким клиентам с одним ключом: у каждого
+    хоста в ней свой пул соединений.
+    
+    Args:
+        api_key: API ключ для авторизации (без ключа заголовки не задаются)
+        
+    Returns:
+        requests.Session: Настроенная сессия
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, pool_block=True, max_retries=0)
+    session.mount("https://", adapter)
+    if api_key:
+        session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        })
+    return session
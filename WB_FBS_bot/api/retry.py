@@ -0,0 +1,24 @@
+"""
+Модуль для расчета задержек между повторными попытками запросов к API
+"""
+import random
+
+# Верхняя граница задержки между повторными попытками, секунд
+MAX_RETRY_DELAY = 60
+
+
+def backoff_delay(attempt: int, base: float, cap: float = MAX_RETRY_DELAY, jitter: float = 0.5) -> float:
+    """
+    Вычисляет задержку перед повторной попыткой: экспоненциальный рост
+    со случайным разбросом, чтобы повторы разных клиентов не совпадали по времени
+    
+    Args:
+        attempt: Номер неудачной попытки (начиная с 1)
+        base: Базовая задержка в секундах
+        cap: Максимальная задержка в секундах
+        jitter: Относительный разброс задержки (0.5 = ±50%)
+        
+    Returns:
+        float: Задержка в секундах
+    """
+    return min(cap, base * 2 ** (attempt - 1) * (1 + random.uniform(-jitter, jitter)))
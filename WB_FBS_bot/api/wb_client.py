@@ -3,13 +3,21 @@
 """
 import requests
 import logging
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional
 from dataclasses import dataclass
 
+from .http_session import create_session, json_loads
+from .retry import backoff_delay
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Order:
-    """Класс для представления заказа"""
+    """
+    Класс для представления заказа
+    
+    Заказ не изменяется после создания; __slots__ убирают __dict__ у
+    каждого экземпляра
+    """
     order_uid: str
     order_id: int
     article: str
@@ -35,42 +43,64 @@ class Order:
         Returns:
             Order: Объект заказа
         """
+        # Локальная ссылка на data.get вместо поиска метода на каждое поле;
+        # цены приходят в копейках, поэтому каждое поле читаем один раз
+        g = data.get
+        sale_price = g("salePrice")
+        price = g("price")
+        final_price = g("finalPrice")
         return cls(
-            order_uid=data.get("orderUid", ""),
-            order_id=data.get("id", 0),
-            article=data.get("article", ""),
-            created_at=data.get("createdAt", ""),
-            sale_price=data.get("salePrice", 0) / 100 if data.get("salePrice") else 0,  # Конвертация из копеек
-            delivery_type=data.get("deliveryType", ""),
-            address=data.get("address", {}),
-            seller_date=data.get("sellerDate", ""),
-            rid=data.get("rid", ""),
-            nm_id=data.get("nmId"),
-            chrt_id=data.get("chrtId"),
-            price=data.get("price", 0) / 100 if data.get("price") else None,
-            final_price=data.get("finalPrice", 0) / 100 if data.get("finalPrice") else None
+            order_uid=g("orderUid", ""),
+            order_id=g("id", 0),
+            article=g("article", ""),
+            created_at=g("createdAt", ""),
+            sale_price=sale_price / 100 if sale_price else 0,  # Конвертация из копеек
+            delivery_type=g("deliveryType", ""),
+            address=g("address", {}),
+            seller_date=g("sellerDate", ""),
+            rid=g("rid", ""),
+            nm_id=g("nmId"),
+            chrt_id=g("chrtId"),
+            price=price / 100 if price else None,
+            final_price=final_price / 100 if final_price else None
         )
+    
+    @classmethod
+    def from_list(cls, data_list: Iterable[Dict]) -> List["Order"]:
+        """
+        Создает список объектов Order из списка словарей
+        
+        Args:
+            data_list: Словари с данными заказов из API
+            
+        Returns:
+            List[Order]: Список заказов
+        """
+        from_dict = cls.from_dict
+        return [from_dict(data) for data in data_list]
 
 
 class WBAPIClient:
     """Класс для работы с API Wildberries"""
     
-    def __init__(self, api_key: str, api_url: str):
+    def __init__(self, api_key: str, api_url: str, session: Optional[requests.Session] = None):
         """
         Инициализация клиента API
         
         Args:
             api_key: API ключ для авторизации
             api_url: URL эндпоинта API
+            session: Общая HTTP-сессия (если не указана, создается своя)
         """
         self.api_key = api_key
         self.api_url = api_url
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
-        self.session.headers.update({
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        })
+        self.session = session or create_session(api_key)
+        # ETag последнего ответа и разобранные из него заказы: если сервер
+        # поддерживает условные запросы, на неизмененный список он отвечает
+        # 304 без тела и заказы берутся из кэша
+        self._last_etag: Optional[str] = None
+        self._last_orders: List[Order] = []
     
     def get_new_orders(self, max_retries: int = 3, retry_delay: int = 10) -> List[Order]:
         """
@@ -91,42 +121,52 @@ class WBAPIClient:
         for attempt in range(1, max_retries + 1):
             try:
                 self.logger.info(f"Запрос новых заказов: {self.api_url} (попытка {attempt}/{max_retries})")
-                response = self.session.get(self.api_url, timeout=30)
+                headers = {"If-None-Match": self._last_etag} if self._last_etag else None
+                response = self.session.get(self.api_url, headers=headers, timeout=30)
+                
+                if response.status_code == 304:
+                    self.logger.info(f"Список заказов не изменился (304), FBS заказов: {len(self._last_orders)}")
+                    return self._last_orders
+                
                 response.raise_for_status()
                 
-                data = response.json()
+                data = json_loads(response.content)
                 orders_data = data.get("orders", [])
                 
-                # Фильтруем только FBS заказы
-                fbs_orders = [
+                # Фильтруем только FBS заказы за один проход: генератор
+                # передает подходящие заказы сразу в from_list
+                orders = Order.from_list(
                     order_data for order_data in orders_data
-                    if order_data.get("deliveryType", "").lower() == "fbs"
-                ]
-                
-                orders = [Order.from_dict(order_data) for order_data in fbs_orders]
+                    if (order_data.get("deliveryType") or "").lower() == "fbs"
+                )
                 self.logger.info(f"Получено {len(orders)} новых FBS заказов")
                 
+                self._last_etag = response.headers.get("ETag")
+                self._last_orders = orders
                 return orders
                 
             except requests.exceptions.Timeout:
                 self.logger.warning(f"Таймаут при запросе к API WB (попытка {attempt}/{max_retries})")
                 if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
+                    delay = backoff_delay(attempt, retry_delay)
+                    self.logger.info(f"Повторная попытка через {delay:.1f} секунд...")
+                    time.sleep(delay)
                 else:
                     raise
             except requests.exceptions.ConnectionError as e:
                 self.logger.warning(f"Ошибка соединения с API WB (попытка {attempt}/{max_retries}): {e}")
                 if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
+                    delay = backoff_delay(attempt, retry_delay)
+                    self.logger.info(f"Повторная попытка через {delay:.1f} секунд...")
+                    time.sleep(delay)
                 else:
                     raise
             except requests.exceptions.RequestException as e:
                 self.logger.error(f"Ошибка при запросе к API WB (попытка {attempt}/{max_retries}): {e}")
                 if attempt < max_retries:
-                    self.logger.info(f"Повторная попытка через {retry_delay} секунд...")
-                    time.sleep(retry_delay)
+                    delay = backoff_delay(attempt, retry_delay)
+                    self.logger.info(f"Повторная попытка через {delay:.1f} секунд...")
+                    time.sleep(delay)
                 else:
                     raise
             except KeyError as e:
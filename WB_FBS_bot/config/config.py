@@ -41,14 +41,19 @@ def _load_dotenv():
 def _load_env_manual(env_path):
     """Загружает .env файл вручную"""
     with open(env_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip().strip('"').strip("'")
-                if key not in os.environ:  # Не перезаписываем существующие
-                    os.environ[key] = value
+        lines = f.read().splitlines()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        # partition не создает список, в отличие от split
+        key, sep, value = line.partition('=')
+        if not sep:
+            continue
+        key = key.strip()
+        value = value.strip().strip('"\'')
+        if key not in os.environ:  # Не перезаписываем существующие
+            os.environ[key] = value
 
 _load_dotenv()
 
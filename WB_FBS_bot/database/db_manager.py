@@ -1,16 +1,154 @@
 """
 Модуль для работы с базой данных SQLite
 """
+import datetime
 import sqlite3
 import logging
 import os
+import threading
 import time
-from typing import List, Optional, Callable, TypeVar, Any
+from typing import List, Optional, Set, Tuple, Callable, TypeVar, Any
 from contextlib import contextmanager
 from functools import wraps
 
 T = TypeVar('T')
 
+# Логгер модуля: общий для DatabaseManager и декоратора retry_db_operation
+_LOG = logging.getLogger(__name__)
+
+_UTC = datetime.timezone.utc
+_SECONDS_PER_DAY = 86400
+
+# Настройки, действующие только в рамках одного подключения: при WAL
+# достаточно synchronous=NORMAL (fsync только при checkpoint), временные
+# таблицы в памяти, кэш страниц ~64 МБ, ожидание блокировки до 30 секунд
+_SQL_CONNECTION_PRAGMAS = """
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-64000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=30000;
+"""
+
+# Запросы менеджера. Тексты запросов - одни и те же объекты str, поэтому
+# подготовленные выражения берутся из кэша подключения, а не разбираются
+# SQLite заново
+# processed_at - время обработки в секундах Unix (UTC): 8-байтовое целое
+# сравнивается и индексируется дешевле строки ISO 8601
+_SQL_CREATE_ORDERS = """
+    CREATE TABLE IF NOT EXISTS processed_orders (
+        order_uid TEXT PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        processed_at INTEGER NOT NULL
+    )
+"""
+_SQL_PROCESSED_AT_TYPE = (
+    "SELECT type FROM pragma_table_info('processed_orders') WHERE name = 'processed_at'"
+)
+# Перевод таблицы из старой схемы (processed_at TEXT в ISO 8601): тип столбца
+# в SQLite не меняется, поэтому таблица пересоздается. Нераспознанные даты
+# становятся 0 и удаляются при следующей очистке
+_SQL_MIGRATE_PROCESSED_AT = (
+    """
+    CREATE TABLE processed_orders_new (
+        order_uid TEXT PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        processed_at INTEGER NOT NULL
+    )
+    """,
+    """
+    INSERT INTO processed_orders_new (order_uid, order_id, created_at, processed_at)
+    SELECT order_uid, order_id, created_at,
+           COALESCE(CAST(strftime('%s', processed_at) AS INTEGER), 0)
+    FROM processed_orders
+    """,
+    "DROP TABLE processed_orders",
+    "ALTER TABLE processed_orders_new RENAME TO processed_orders",
+)
+# Индекс для выборок по диапазону processed_at (очистка, счетчик за дату)
+_SQL_CREATE_PROCESSED_AT_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_processed_at ON processed_orders(processed_at)"
+)
+_SQL_CREATE_SETTINGS = """
+    CREATE TABLE IF NOT EXISTS bot_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+"""
+# EXISTS всегда возвращает ровно одну строку 0/1
+_SQL_IS_PROCESSED = "SELECT EXISTS(SELECT 1 FROM processed_orders WHERE order_uid = ? LIMIT 1)"
+_SQL_PROCESSED_UIDS = "SELECT order_uid FROM processed_orders"
+# Выборка обработанных заказов из списка: плейсхолдеры IN (...) подставляются
+# по размеру пачки
+_SQL_PROCESSED_UIDS_IN = "SELECT order_uid FROM processed_orders WHERE order_uid IN ({})"
+# Не больше параметров в одном запросе, чем допускает SQLite
+# (SQLITE_MAX_VARIABLE_NUMBER в старых сборках - 999)
+_IN_CHUNK_SIZE = 500
+# UPSERT обновляет существующую строку на месте, а не удаляет
+# и вставляет ее заново, как INSERT OR REPLACE
+_SQL_MARK_PROCESSED = """
+    INSERT INTO processed_orders (order_uid, order_id, created_at, processed_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(order_uid) DO UPDATE SET
+        order_id = excluded.order_id,
+        created_at = excluded.created_at,
+        processed_at = excluded.processed_at
+"""
+_SQL_COUNT_PROCESSED = "SELECT COUNT(*) FROM processed_orders"
+_SQL_DELETE_OLD = "DELETE FROM processed_orders WHERE processed_at < ?"
+# Полуоткрытый диапазон [начало дня, начало следующего дня) в секундах Unix
+_SQL_COUNT_FOR_PERIOD = "SELECT COUNT(*) FROM processed_orders WHERE processed_at >= ? AND processed_at < ?"
+_SQL_GET_SETTING = "SELECT value FROM bot_settings WHERE key = ?"
+_SQL_SET_SETTING = """
+    INSERT INTO bot_settings (key, value) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+_SQL_ADD_SETTING = "INSERT INTO bot_settings (key, value) VALUES (?, ?)"
+
+# Размер кэша подготовленных выражений подключения (по умолчанию 128)
+_CACHED_STATEMENTS = 256
+
+# Основные коды ошибок SQLite, при которых операцию имеет смысл повторить
+_SQLITE_BUSY = 5
+_SQLITE_LOCKED = 6
+_SQLITE_CANTOPEN = 14
+
+
+def _is_lock_error(error: sqlite3.Error) -> bool:
+    """
+    Проверяет, вызвана ли ошибка временной блокировкой БД
+    
+    Args:
+        error: Исключение sqlite3
+        
+    Returns:
+        bool: True для SQLITE_BUSY / SQLITE_LOCKED
+    """
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is None:
+        # До Python 3.11 кода ошибки нет, разбираем текст
+        return 'locked' in str(error).lower()
+    # Расширенные коды (например, SQLITE_BUSY_SNAPSHOT) содержат основной в младшем байте
+    return (code & 0xFF) in (_SQLITE_BUSY, _SQLITE_LOCKED)
+
+
+def _is_cantopen_error(error: sqlite3.Error) -> bool:
+    """
+    Проверяет, вызвана ли ошибка невозможностью открыть файл БД
+    
+    Args:
+        error: Исключение sqlite3
+        
+    Returns:
+        bool: True для SQLITE_CANTOPEN
+    """
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is None:
+        return 'unable to open database file' in str(error).lower()
+    return (code & 0xFF) == _SQLITE_CANTOPEN
+
 
 def retry_db_operation(max_retries: int = 3, delay: float = 0.1, backoff: float = 2.0):
     """
@@ -31,20 +169,20 @@ def retry_db_operation(max_retries: int = 3, delay: float = 0.1, backoff: float
                 try:
                     return func(self, *args, **kwargs)
                 except sqlite3.OperationalError as e:
-                    # Проверяем, является ли это временной блокировкой
-                    error_msg = str(e).lower()
+                    # Проверяем по коду ошибки, является ли это временной блокировкой.
+                    # Обычно ожидание блокировки выполняет сам SQLite (busy_timeout),
+                    # сюда доходят случаи, когда ждать на уровне SQLite нельзя
                     is_temporary = (
-                        'locked' in error_msg or 
-                        'database is locked' in error_msg or
-                        ('unable to open database file' in error_msg and attempt < max_retries - 1)
+                        _is_lock_error(e) or
+                        (_is_cantopen_error(e) and attempt < max_retries - 1)
                     )
                     
                     if is_temporary:
                         last_exception = e
                         if attempt < max_retries - 1:
-                            self.logger.debug(
-                                f"Временная ошибка БД при {func.__name__}: {e}, "
-                                f"попытка {attempt + 1}/{max_retries}, ждем {current_delay:.2f}с"
+                            _LOG.debug(
+                                "Временная ошибка БД при %s: %s, попытка %s/%s, ждем %.2fс",
+                                func.__name__, e, attempt + 1, max_retries, current_delay
                             )
                             time.sleep(current_delay)
                             current_delay *= backoff
@@ -57,8 +195,9 @@ def retry_db_operation(max_retries: int = 3, delay: float = 0.1, backoff: float
             
             # Если все попытки исчерпаны, пробрасываем последнюю ошибку
             if last_exception:
-                self.logger.warning(
-                    f"Не удалось выполнить {func.__name__} после {max_retries} попыток: {last_exception}"
+                _LOG.warning(
+                    "Не удалось выполнить %s после %s попыток: %s",
+                    func.__name__, max_retries, last_exception
                 )
                 raise last_exception
             
@@ -76,12 +215,19 @@ class DatabaseManager:
         Args:
             db_path: Путь к файлу базы данных
         """
-        self.logger = logging.getLogger(__name__)
+        self.logger = _LOG
         # Нормализуем путь: делаем абсолютным и создаем директорию, если нужно
-        self.logger.debug(f"Исходный путь к БД: {db_path} (абсолютный: {os.path.isabs(db_path)})")
+        self.logger.debug("Исходный путь к БД: %s (абсолютный: %s)", db_path, os.path.isabs(db_path))
         self.db_path = self._normalize_db_path(db_path)
         self.logger.info(f"Используется база данных: {self.db_path}")
+        # Одно подключение на все время работы вместо открытия на каждый
+        # запрос; RLock не дает потокам выполнять запросы одновременно
+        self._lock = threading.RLock()
+        self._conn = self._connect()
         self._init_database()
+        # Заказ, однажды помеченный обработанным, остается таким до очистки,
+        # поэтому известные обработанные заказы проверяются без запроса к БД
+        self._processed_uids = self._load_processed_uids()
     
     def _normalize_db_path(self, db_path: str) -> str:
         """
@@ -132,43 +278,31 @@ class DatabaseManager:
                 self.logger.error(error_msg)
                 raise PermissionError(error_msg)
         
-        self.logger.debug(f"Нормализованный путь к БД: {abs_path}, директория: {db_dir}")
+        self.logger.debug("Нормализованный путь к БД: %s, директория: %s", abs_path, db_dir)
         return abs_path
     
-    @contextmanager
-    def _get_connection(self):
+    def _connect(self) -> sqlite3.Connection:
         """
-        Контекстный менеджер для работы с подключением к БД
+        Открывает подключение к БД, общее для всех операций менеджера
         
-        Yields:
+        Returns:
             sqlite3.Connection: Подключение к базе данных
         """
-        conn = None
+        # Существование директории и права на запись уже проверены
+        # в _normalize_db_path
+        db_dir = os.path.dirname(self.db_path)
         try:
-            # Проверяем, что директория существует и доступна для записи
-            db_dir = os.path.dirname(self.db_path)
-            if db_dir and not os.path.exists(db_dir):
-                error_msg = f"Директория {db_dir} не существует"
-                self.logger.error(error_msg)
-                raise FileNotFoundError(error_msg)
-            
-            if db_dir and not os.access(db_dir, os.W_OK):
-                error_msg = f"Нет прав на запись в директорию {db_dir}"
-                self.logger.error(error_msg)
-                raise PermissionError(error_msg)
-            
-            # Пытаемся подключиться к БД с увеличенным timeout для конкурентного доступа
-            self.logger.debug(f"Подключение к базе данных: {self.db_path}")
-            conn = sqlite3.connect(self.db_path, timeout=20.0)
-            conn.row_factory = sqlite3.Row
+            # Пытаемся подключиться к БД с увеличенным timeout для конкурентного доступа;
+            # подключение используется из разных потоков под self._lock
+            self.logger.debug("Подключение к базе данных: %s", self.db_path)
+            conn = sqlite3.connect(
+                self.db_path, timeout=20.0, check_same_thread=False,
+                isolation_level=None, cached_statements=_CACHED_STATEMENTS
+            )
+            conn.executescript(_SQL_CONNECTION_PRAGMAS)
             self.logger.debug("Подключение к базе данных установлено")
+            return conn
         except sqlite3.OperationalError as e:
-            error_str = str(e).lower()
-            # Проверяем, является ли это временной блокировкой
-            if 'locked' in error_str or 'database is locked' in error_str:
-                # Временная блокировка - пробрасываем как есть для retry
-                self.logger.debug(f"Временная блокировка БД: {e}")
-                raise
             # Постоянная ошибка (например, unable to open database file)
             error_msg = (
                 f"Не удалось открыть базу данных {self.db_path}: {e}. "
@@ -177,62 +311,125 @@ class DatabaseManager:
             )
             self.logger.error(error_msg)
             raise
-        except (FileNotFoundError, PermissionError) as e:
-            self.logger.error(f"Ошибка доступа к БД: {e}")
-            raise
         except Exception as e:
             self.logger.error(f"Неожиданная ошибка при подключении к БД: {e}", exc_info=True)
             raise
+    
+    @contextmanager
+    def _get_connection(self, write: bool = False):
+        """
+        Контекстный менеджер для работы с подключением к БД
         
-        try:
-            yield conn
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            self.logger.error(f"Ошибка при работе с БД: {e}")
-            raise
-        finally:
-            conn.close()
+        Выдает общее подключение под блокировкой. Подключение работает в
+        режиме autocommit, поэтому чтение выполняется без транзакции, а для
+        записи открывается транзакция BEGIN IMMEDIATE: commit при успехе,
+        rollback при ошибке
+        
+        Args:
+            write: Выполнить блок в транзакции на запись
+        
+        Yields:
+            sqlite3.Connection: Подключение к базе данных
+        """
+        with self._lock:
+            conn = self._conn
+            try:
+                if write:
+                    # IMMEDIATE берет блокировку на запись сразу, а не при
+                    # первом изменении, когда ее получение может дать SQLITE_BUSY
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+                if write:
+                    conn.execute("COMMIT")
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self.logger.error(f"Ошибка при работе с БД: {e}")
+                raise
+    
+    def close(self) -> None:
+        """Закрывает подключение к базе данных"""
+        with self._lock:
+            self._conn.close()
+            self.logger.info("Подключение к базе данных закрыто")
     
     def _init_database(self) -> None:
         """Инициализация структуры базы данных"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS processed_orders (
-                    order_uid TEXT PRIMARY KEY,
-                    order_id INTEGER NOT NULL,
-                    created_at TEXT NOT NULL,
-                    processed_at TEXT NOT NULL
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bot_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            """)
-            conn.commit()
+            # WAL сохраняется в файле БД, поэтому включается один раз:
+            # чтение не блокируется записью, а запись не ждет читателей.
+            # Режим журнала нельзя сменить внутри транзакции
+            conn.execute("PRAGMA journal_mode=WAL")
+        with self._get_connection(write=True) as conn:
+            conn.execute(_SQL_CREATE_ORDERS)
+            if conn.execute(_SQL_PROCESSED_AT_TYPE).fetchone()[0].upper() == 'TEXT':
+                for sql in _SQL_MIGRATE_PROCESSED_AT:
+                    conn.execute(sql)
+                self.logger.info("Таблица processed_orders переведена на processed_at в секундах Unix")
+            conn.execute(_SQL_CREATE_PROCESSED_AT_INDEX)
+            conn.execute(_SQL_CREATE_SETTINGS)
             self.logger.info("База данных инициализирована")
     
+    def _load_processed_uids(self) -> Set[str]:
+        """
+        Загружает идентификаторы всех обработанных заказов из БД
+        
+        Returns:
+            Set[str]: Множество order_uid
+        """
+        with self._get_connection() as conn:
+            return {row[0] for row in conn.execute(_SQL_PROCESSED_UIDS)}
+    
     @retry_db_operation(max_retries=3, delay=0.1, backoff=2.0)
     def is_order_processed(self, order_uid: str) -> bool:
         """
         Проверяет, был ли заказ уже обработан
         
+        Сначала проверяется множество в памяти; к БД обращаемся только для
+        неизвестных заказов - их мог пометить другой процесс
+        
         Args:
             order_uid: Уникальный идентификатор заказа
             
         Returns:
             bool: True если заказ уже обработан, False иначе
         """
+        if order_uid in self._processed_uids:
+            return True
+        
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT 1 FROM processed_orders WHERE order_uid = ?",
-                (order_uid,)
-            )
-            return cursor.fetchone() is not None
+            processed = bool(conn.execute(_SQL_IS_PROCESSED, (order_uid,)).fetchone()[0])
+        if processed:
+            self._processed_uids.add(order_uid)
+        return processed
+    
+    @retry_db_operation(max_retries=3, delay=0.1, backoff=2.0)
+    def filter_processed(self, order_uids: List[str]) -> Set[str]:
+        """
+        Возвращает те заказы из списка, которые уже были обработаны
+        
+        Заказы, известные по множеству в памяти, не запрашиваются; остальные
+        проверяются одним запросом на каждые _IN_CHUNK_SIZE идентификаторов
+        
+        Args:
+            order_uids: Список уникальных идентификаторов заказов
+            
+        Returns:
+            Set[str]: Множество уже обработанных order_uid
+        """
+        processed = {uid for uid in order_uids if uid in self._processed_uids}
+        unknown = list({uid for uid in order_uids if uid not in processed})
+        if not unknown:
+            return processed
+        
+        with self._get_connection() as conn:
+            for i in range(0, len(unknown), _IN_CHUNK_SIZE):
+                chunk = unknown[i:i + _IN_CHUNK_SIZE]
+                sql = _SQL_PROCESSED_UIDS_IN.format(",".join("?" * len(chunk)))
+                found = {row[0] for row in conn.execute(sql, chunk)}
+                self._processed_uids.update(found)
+                processed |= found
+        return processed
     
     @retry_db_operation(max_retries=3, delay=0.1, backoff=2.0)
     def mark_order_as_processed(self, order_uid: str, order_id: int, created_at: str) -> None:
@@ -244,18 +441,31 @@ class DatabaseManager:
             order_id: ID заказа
             created_at: Дата создания заказа
         """
-        import datetime
+        processed_at = int(time.time())
+        with self._get_connection(write=True) as conn:
+            conn.execute(_SQL_MARK_PROCESSED, (order_uid, order_id, created_at, processed_at))
+            self.logger.debug("Заказ %s помечен как обработанный", order_uid)
+        self._processed_uids.add(order_uid)
+    
+    @retry_db_operation(max_retries=3, delay=0.1, backoff=2.0)
+    def mark_orders_as_processed(self, orders: List[Tuple[str, int, str]]) -> None:
+        """
+        Помечает несколько заказов как обработанные в одной транзакции
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            processed_at = datetime.datetime.utcnow().isoformat()
-            cursor.execute("""
-                INSERT OR REPLACE INTO processed_orders 
-                (order_uid, order_id, created_at, processed_at)
-                VALUES (?, ?, ?, ?)
-            """, (order_uid, order_id, created_at, processed_at))
-            conn.commit()
-            self.logger.debug(f"Заказ {order_uid} помечен как обработанный")
+        Args:
+            orders: Список кортежей (order_uid, order_id, created_at)
+        """
+        if not orders:
+            return
+        
+        processed_at = int(time.time())
+        with self._get_connection(write=True) as conn:
+            conn.executemany(
+                _SQL_MARK_PROCESSED,
+                [(order_uid, order_id, created_at, processed_at) for order_uid, order_id, created_at in orders]
+            )
+            self.logger.debug("Помечено как обработанные заказов: %s", len(orders))
+        self._processed_uids.update(order_uid for order_uid, _, _ in orders)
     
     def get_processed_orders_count(self) -> int:
         """
@@ -265,9 +475,7 @@ class DatabaseManager:
             int: Количество обработанных заказов
         """
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM processed_orders")
-            result = cursor.fetchone()
+            result = conn.execute(_SQL_COUNT_PROCESSED).fetchone()
             return result[0] if result else 0
     
     def cleanup_old_orders(self, days: int = 30) -> int:
@@ -280,19 +488,14 @@ class DatabaseManager:
         Returns:
             int: Количество удаленных записей
         """
-        import datetime
-        
-        cutoff_date = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).isoformat()
+        cutoff = int(time.time()) - days * _SECONDS_PER_DAY
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM processed_orders WHERE processed_at < ?",
-                (cutoff_date,)
-            )
-            deleted_count = cursor.rowcount
-            conn.commit()
+        with self._get_connection(write=True) as conn:
+            deleted_count = conn.execute(_SQL_DELETE_OLD, (cutoff,)).rowcount
             self.logger.info(f"Удалено {deleted_count} старых записей")
+            if deleted_count:
+                # Удаленные заказы больше не считаются обработанными
+                self._processed_uids = self._load_processed_uids()
             return deleted_count
     
     def get_setting(self, key: str) -> Optional[str]:
@@ -306,12 +509,7 @@ class DatabaseManager:
             Optional[str]: Значение настройки или None
         """
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT value FROM bot_settings WHERE key = ?",
-                (key,)
-            )
-            result = cursor.fetchone()
+            result = conn.execute(_SQL_GET_SETTING, (key,)).fetchone()
             return result[0] if result else None
     
     def set_setting(self, key: str, value: str) -> None:
@@ -322,14 +520,9 @@ class DatabaseManager:
             key: Ключ настройки
             value: Значение настройки
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO bot_settings (key, value)
-                VALUES (?, ?)
-            """, (key, value))
-            conn.commit()
-            self.logger.debug(f"Настройка {key} сохранена")
+        with self._get_connection(write=True) as conn:
+            conn.execute(_SQL_SET_SETTING, (key, value))
+            self.logger.debug("Настройка %s сохранена", key)
     
     @retry_db_operation(max_retries=3, delay=0.1, backoff=2.0)
     def set_setting_if_not_exists(self, key: str, value: str) -> bool:
@@ -344,19 +537,14 @@ class DatabaseManager:
             bool: True если значение было установлено, False если уже существовало
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
+            with self._get_connection(write=True) as conn:
                 # Пытаемся вставить, если ключа еще нет
-                cursor.execute("""
-                    INSERT INTO bot_settings (key, value)
-                    VALUES (?, ?)
-                """, (key, value))
-                conn.commit()
-                self.logger.debug(f"Настройка {key} установлена (не существовала)")
+                conn.execute(_SQL_ADD_SETTING, (key, value))
+                self.logger.debug("Настройка %s установлена (не существовала)", key)
                 return True
         except sqlite3.IntegrityError:
             # Ключ уже существует - это нормально
-            self.logger.debug(f"Настройка {key} уже существует")
+            self.logger.debug("Настройка %s уже существует", key)
             return False
     
     def get_orders_count_for_date(self, date: str) -> int:
@@ -369,21 +557,14 @@ class DatabaseManager:
         Returns:
             int: Количество заказов за дату
         """
-        import datetime
-        
         if date == 'today':
-            target_date = datetime.datetime.utcnow().date()
+            target_date = datetime.datetime.now(_UTC).date()
         else:
             target_date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
         
-        start_datetime = datetime.datetime.combine(target_date, datetime.time.min).isoformat()
-        end_datetime = datetime.datetime.combine(target_date, datetime.time.max).isoformat()
+        # Начало суток UTC в секундах Unix
+        start = int(datetime.datetime.combine(target_date, datetime.time(), _UTC).timestamp())
         
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM processed_orders 
-                WHERE processed_at >= ? AND processed_at <= ?
-            """, (start_datetime, end_datetime))
-            result = cursor.fetchone()
+            result = conn.execute(_SQL_COUNT_FOR_PERIOD, (start, start + _SECONDS_PER_DAY)).fetchone()
             return result[0] if result else 0
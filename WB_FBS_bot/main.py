@@ -8,20 +8,16 @@ from monitor import OrderMonitor
 
 
 def setup_logging() -> None:
-    """Настройка логирования с принудительным flush для демона"""
-    # Создаем кастомный handler с flush
-    class FlushingStreamHandler(logging.StreamHandler):
-        def emit(self, record):
-            super().emit(record)
-            self.flush()
-    
-    class FlushingFileHandler(logging.FileHandler):
-        def emit(self, record):
-            super().emit(record)
-            self.flush()
+    """Настройка логирования для работы в режиме демона"""
+    # Построчная буферизация stdout и stderr: каждая строка сразу попадает
+    # в журнал демона без ручных flush(). Обработчики logging сами
+    # сбрасывают поток после каждой записи
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(line_buffering=True)
     
     # Консольный handler - INFO и выше (для отладки)
-    console_handler = FlushingStreamHandler(sys.stdout)
+    console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -29,7 +25,7 @@ def setup_logging() -> None:
     ))
     
     # Файловый handler - только WARNING и выше (чтобы не разрастался)
-    file_handler = FlushingFileHandler('wb_fbs_bot.log', encoding='utf-8')
+    file_handler = logging.FileHandler('wb_fbs_bot.log', encoding='utf-8')
     file_handler.setLevel(logging.WARNING)
     file_handler.setFormatter(logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -42,10 +38,6 @@ def setup_logging() -> None:
     root_logger.handlers.clear()  # Очищаем существующие handlers
     root_logger.addHandler(console_handler)
     root_logger.addHandler(file_handler)
-    
-    # Принудительный flush для stdout
-    sys.stdout.flush()
-    sys.stderr.flush()
 
 
 def main():
@@ -2,27 +2,84 @@
 Модуль для работы с Telegram ботом
 """
 import logging
+import threading
 import time
 from typing import Optional, Dict
 import requests
 
+from api.http_session import create_session, json_dumps, json_loads
+
+# Telegram допускает около одного сообщения в секунду в один чат
+# (общий лимит 30 сообщений в секунду действует только для разных чатов)
+_CHAT_MESSAGE_INTERVAL = 1.0
+# Тело запроса сериализуется заранее, поэтому тип задается явно
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class _ChatRateLimiter:
+    """Выдерживает интервал между сообщениями в один чат, безопасен для потоков"""
+    
+    def __init__(self, interval: float):
+        """
+        Инициализация ограничителя
+        
+        Args:
+            interval: Минимальный интервал между сообщениями в один чат (секунды)
+        """
+        self.interval = interval
+        # chat_id -> время (time.monotonic()), раньше которого писать в чат нельзя
+        self._next_send: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, chat_id: str) -> None:
+        """
+        Блокирует поток до момента, когда в чат можно отправить сообщение
+        
+        Args:
+            chat_id: ID чата
+        """
+        with self._lock:
+            now = time.monotonic()
+            send_at = max(now, self._next_send.get(chat_id, now))
+            self._next_send[chat_id] = send_at + self.interval
+        if send_at > now:
+            time.sleep(send_at - now)
+    
+    def defer(self, chat_id: str, delay: float) -> None:
+        """
+        Откладывает следующую отправку в чат (например, по retry_after из ответа 429)
+        
+        Args:
+            chat_id: ID чата
+            delay: Задержка в секундах
+        """
+        with self._lock:
+            send_at = time.monotonic() + delay
+            self._next_send[chat_id] = max(self._next_send.get(chat_id, send_at), send_at)
+
 
 class TelegramBot:
     """Класс для отправки уведомлений в Telegram"""
     
-    def __init__(self, bot_token: str, chat_id: Optional[str] = None):
+    def __init__(self, bot_token: str, chat_id: Optional[str] = None, session: Optional[requests.Session] = None):
         """
         Инициализация Telegram бота
         
         Args:
             bot_token: Токен бота
             chat_id: ID чата для отправки сообщений (опционально, будет получен из обновлений)
+            session: HTTP-сессия (если не указана, создается своя)
         """
         self.bot_token = bot_token
         self._chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
         self.logger = logging.getLogger(__name__)
         self.last_update_id = 0
+        # Keep-alive соединения с api.telegram.org вместо нового TLS
+        # рукопожатия на каждое сообщение
+        self.session = session or create_session()
+        # Уведомления и отчеты (из потоков таймеров) идут в один чат
+        self._rate_limiter = _ChatRateLimiter(_CHAT_MESSAGE_INTERVAL)
     
     @property
     def chat_id(self) -> Optional[str]:
@@ -62,9 +119,21 @@ class TelegramBot:
             "parse_mode": parse_mode
         }
         
+        # Тело сериализуется один раз на все попытки
+        body = json_dumps(payload)
+        
         for attempt in range(1, max_retries + 1):
             try:
-                response = requests.post(url, json=payload, timeout=10)
+                self._rate_limiter.wait(target_chat_id)
+                response = self.session.post(url, data=body, headers=_JSON_HEADERS, timeout=10)
+                
+                # Превышен лимит: Telegram сообщает, сколько секунд ждать
+                if response.status_code == 429:
+                    delay = self._get_retry_after(response, retry_delay)
+                    self.logger.warning(f"Лимит Telegram (429), ждем {delay} секунд (попытка {attempt}/{max_retries})")
+                    self._rate_limiter.defer(target_chat_id, delay)
+                    continue
+                
                 response.raise_for_status()
                 self.logger.debug("Сообщение успешно отправлено в Telegram")
                 return True
@@ -84,6 +153,23 @@ class TelegramBot:
         self.logger.error(f"Не удалось отправить сообщение после {max_retries} попыток")
         return False
     
+    def _get_retry_after(self, response: requests.Response, default: float) -> float:
+        """
+        Возвращает задержку из ответа 429 (parameters.retry_after)
+        
+        Args:
+            response: Ответ Telegram API со статусом 429
+            default: Задержка, если в ответе ее нет
+            
+        Returns:
+            float: Задержка в секундах
+        """
+        try:
+            return json_loads(response.content)["parameters"]["retry_after"]
+        except (ValueError, KeyError, TypeError):
+            retry_after = response.headers.get("Retry-After")
+            return int(retry_after) if retry_after and retry_after.isdigit() else default
+    
     def format_order_notification(self, order) -> str:
         """
         Форматирует уведомление о новом заказе
@@ -252,7 +338,7 @@ class TelegramBot:
         for attempt in range(1, max_retries + 1):
             try:
                 url = f"{self.base_url}/getMe"
-                response = requests.get(url, timeout=10)
+                response = self.session.get(url, timeout=10)
                 response.raise_for_status()
                 return True
             except requests.exceptions.Timeout:
@@ -287,9 +373,9 @@ class TelegramBot:
         }
         
         try:
-            response = requests.get(url, params=params, timeout=timeout + 5)
+            response = self.session.get(url, params=params, timeout=timeout + 5)
             response.raise_for_status()
-            data = response.json()
+            data = json_loads(response.content)
             
             if data.get("ok"):
                 updates = data.get("result", [])